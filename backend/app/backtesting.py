@@ -0,0 +1,220 @@
+# backend/app/backtesting.py
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+from sklearn.metrics import r2_score, mean_absolute_error, mean_squared_error
+from typing import List, Dict, Any
+from model_trainer import ModelTrain
+from train_models import ENERGY_CONFIG, load_data
+import pandas as pd
+import numpy as np
+import argparse
+import time
+import os
+
+# Hyperparamètres repris du modèle sauvegardé (ceux explorés par ModelTrain.train)
+TUNED_PARAMS = ("n_estimators", "max_depth", "min_samples_split", "min_samples_leaf")
+
+# Vue sur le jeu de données partagé, initialisée une fois par processus de travail
+_shared = {}
+
+
+def _init_worker(name: str, shape: tuple, columns: List[str]):
+    # Les workers partagent le resource_tracker du processus principal, seul lui supprime le segment
+    shm = SharedMemory(name=name)
+    _shared["shm"] = shm
+    _shared["data"] = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+    _shared["columns"] = columns
+
+
+def _run_window(task: Dict[str, Any]) -> Dict[str, Any]:
+    """Entraîne sur [train_start, train_end) puis prédit [train_end, test_end)"""
+    data, columns = _shared["data"], _shared["columns"]
+    train = pd.DataFrame(data[task["train_start"]:task["train_end"]], columns=columns)
+    test = pd.DataFrame(data[task["train_end"]:task["test_end"]], columns=columns)
+
+    trainer = ModelTrain(task["producer_type"], task["features"], task["target"],
+                         random_state=task["random_state"])
+    start = time.perf_counter()
+    trainer.fit(train, task["params"], n_jobs=1)
+    fit_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    y_pred = trainer.predict(test)
+    predict_s = time.perf_counter() - start
+
+    y_true = test[task["target"]].to_numpy()
+    return {
+        "site": task["site"],
+        "train_window": task["train_window"],
+        "cadence": task["cadence"],
+        "train_start": task["train_start"],
+        "train_end": task["train_end"],
+        "test_end": task["test_end"],
+        "train_rows": len(train),
+        "test_rows": len(test),
+        "MAE": mean_absolute_error(y_true, y_pred),
+        "RMSE": np.sqrt(mean_squared_error(y_true, y_pred)),
+        "R2": r2_score(y_true, y_pred) if len(test) > 1 else np.nan,
+        "bias": float(np.mean(y_pred - y_true)),
+        "fit_s": fit_s,
+        "predict_s": predict_s,
+    }
+
+
+def walk_forward_windows(n_rows: int, train_window: int, cadence: int,
+                         min_train: int = 30) -> List[tuple]:
+    """
+    Fenêtres (train_start, train_end, test_end) : réentraînement toutes les `cadence` lignes,
+    sur les `train_window` dernières lignes (ou tout l'historique si 0).
+    """
+    first = train_window or min_train
+    windows = []
+    for train_end in range(first, n_rows, cadence):
+        train_start = train_end - train_window if train_window else 0
+        windows.append((train_start, train_end, min(train_end + cadence, n_rows)))
+    return windows
+
+
+def saved_params(producer_type: str, features: List[str], target: str) -> Dict[str, Any]:
+    try:
+        model = ModelTrain.load(producer_type, features, target).model
+    except FileNotFoundError:
+        return {}
+    params = model.get_params()
+    return {name: params[name] for name in TUNED_PARAMS}
+
+
+class Backtester:
+    def __init__(self, producer_type: str,
+                 features: List[str],
+                 target: str,
+                 params: Dict[str, Any] = None,
+                 random_state: int = 5):
+        self.producer_type = producer_type
+        self.features = features
+        self.target = target
+        self.params = params if params is not None else saved_params(producer_type, features, target)
+        self.random_state = random_state
+
+    def run(self, data: pd.DataFrame,
+            train_windows: List[int],
+            cadences: List[int],
+            max_workers: int = None) -> pd.DataFrame:
+        """
+        Backtest walk-forward pour chaque couple (fenêtre d'entraînement, cadence),
+        les fenêtres sont réparties sur plusieurs processus (train_window = 0 : tout l'historique).
+        Avec plusieurs sites, chaque site a ses propres fenêtres sur son historique.
+        """
+        data = data.dropna(subset=self.features + [self.target])
+        if "site" in data.columns:
+            data = data.sort_values(["site", "date"] if "date" in data.columns else ["site"], kind="stable")
+        data = data.reset_index(drop=True)
+        columns = self.features + [self.target]
+        values = data[columns].to_numpy(dtype=np.float64)
+
+        # Lignes contiguës de chaque site : (site, début, fin)
+        if "site" in data.columns:
+            segments = [(site, rows[0], rows[-1] + 1) for site, rows in data.groupby("site", sort=False).indices.items()]
+        else:
+            segments = [(None, 0, len(data))]
+
+        tasks = [
+            {
+                "producer_type": self.producer_type,
+                "features": self.features,
+                "target": self.target,
+                "params": self.params,
+                "random_state": self.random_state,
+                "site": site,
+                "train_window": train_window,
+                "cadence": cadence,
+                "train_start": offset + train_start,
+                "train_end": offset + train_end,
+                "test_end": offset + test_end,
+            }
+            for site, offset, end in segments
+            for train_window in train_windows
+            for cadence in cadences
+            for train_start, train_end, test_end in walk_forward_windows(end - offset, train_window, cadence)
+        ]
+        if not tasks:
+            raise ValueError(f"Pas assez de données ({len(values)} lignes) pour les fenêtres demandées")
+
+        # Le jeu de données est copié une seule fois en mémoire partagée, les tâches ne transportent que des indices
+        workers = max_workers or os.cpu_count() or 1
+        shm = SharedMemory(create=True, size=values.nbytes)
+        try:
+            np.ndarray(values.shape, dtype=np.float64, buffer=shm.buf)[:] = values
+            with ProcessPoolExecutor(max_workers=workers,
+                                     initializer=_init_worker,
+                                     initargs=(shm.name, values.shape, columns)) as executor:
+                chunksize = max(1, len(tasks) // (4 * workers))
+                rows = list(executor.map(_run_window, tasks, chunksize=chunksize))
+        finally:
+            shm.close()
+            shm.unlink()
+
+        results = pd.DataFrame(rows)
+        if "date" in data.columns:
+            dates = data["date"].astype(str).to_numpy()
+            results["train_start_date"] = dates[results["train_start"]]
+            results["test_start_date"] = dates[results["train_end"]]
+            results["test_end_date"] = dates[results["test_end"] - 1]
+        return results
+
+    @staticmethod
+    def summary(results: pd.DataFrame) -> pd.DataFrame:
+        """Erreurs moyennes et temps cumulés par couple (fenêtre d'entraînement, cadence)"""
+        return (
+            results.groupby(["train_window", "cadence"])
+            .agg(windows=("MAE", "size"),
+                 MAE=("MAE", "mean"),
+                 RMSE=("RMSE", "mean"),
+                 R2=("R2", "mean"),
+                 bias=("bias", "mean"),
+                 fit_s=("fit_s", "sum"),
+                 predict_s=("predict_s", "sum"))
+            .reset_index()
+        )
+
+
+def main(energy_type: str, train_windows: List[int], cadences: List[int],
+         max_workers: int = None, output: str = None, site: str = None):
+    print(f"--- Backtest walk-forward pour : {energy_type.upper()} ---")
+    df = load_data(energy_type, site=site)
+    if df.empty:
+        print("Aucune donnée trouvée pour ce type d'énergie. Backtest annulé.")
+        return
+
+    config = ENERGY_CONFIG[energy_type]
+    backtester = Backtester(energy_type, config["features"], config["target"])
+    print(f"Hyperparamètres utilisés : {backtester.params}")
+
+    start = time.perf_counter()
+    results = backtester.run(df, train_windows, cadences, max_workers)
+    print(f"{len(results)} fenêtres évaluées en {time.perf_counter() - start:.1f}s")
+    print("(train_window = 0 : fenêtre croissante sur tout l'historique)")
+    print(Backtester.summary(results).to_string(index=False))
+
+    if output:
+        results.to_csv(output, index=False)
+        print(f"Résultats par fenêtre sauvegardés ici : {output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backtest walk-forward des modèles d'énergie.")
+    parser.add_argument(
+        "energy_type",
+        type=str,
+        choices=["hydro", "eolienne", "solaire"],
+        help="Type d'énergie à évaluer"
+    )
+    parser.add_argument("--train-windows", type=int, nargs="+", default=[0, 365, 730],
+                        help="Tailles de fenêtre d'entraînement en lignes (0 = tout l'historique)")
+    parser.add_argument("--cadences", type=int, nargs="+", default=[7, 30, 90],
+                        help="Nombre de lignes entre deux réentraînements")
+    parser.add_argument("--workers", type=int, default=None, help="Nombre de processus (tous les coeurs par défaut)")
+    parser.add_argument("--output", type=str, default=None, help="Fichier CSV des résultats par fenêtre")
+    parser.add_argument("--site", type=str, default=None, help="Site à évaluer (tous les sites, chacun sur son historique, par défaut)")
+    args = parser.parse_args()
+    main(args.energy_type, args.train_windows, args.cadences, args.workers, args.output, args.site)
@@ -1,17 +1,20 @@
 from supabase import create_client, Client
-from sqlalchemy import create_engine, MetaData, Table, Column, Float, Integer, DateTime, text
+from sqlalchemy import create_engine, MetaData, Table, Column, Float, Integer, String, DateTime, UniqueConstraint, text
 from sqlalchemy.pool import NullPool
 from dotenv import load_dotenv
+from typing import Any, Dict
 import pandas as pd
 import pathlib as pl
 import os
+# Même site par défaut que les handlers (module sans dépendance, importé depuis la racine du dépôt)
+from handlers.sites import DEFAULT_SITE
 
 load_dotenv()
 TYPES = os.getenv("types")
 
 class Database():
     def __init__(self, url:str, service_key: str, database_url: str, energy_type: str = None):
-        if energy_type not in (None, TYPES):
+        if energy_type is not None and energy_type not in TYPES:
             raise ValueError(f"energy_type doit être parmi {TYPES} ou None pour tous, reçu: {energy_type}")
         self.energy_type = energy_type
         self.engine = create_engine(database_url, poolclass=NullPool)
@@ -27,31 +30,37 @@ class Database():
                 "solaire_data",
                 self.meta,
                 Column('id', Integer, primary_key=True),
-                Column('date', DateTime, nullable=True, unique=True),
+                Column('site', String, nullable=False, server_default=DEFAULT_SITE["solaire"]),
+                Column('date', DateTime, nullable=True),
                 Column('prod_solaire', Float, nullable=True),
                 Column('global_tilted_irradiance', Float, nullable=True),
-                Column('temperature_2m', Float, nullable=True)
+                Column('temperature_2m', Float, nullable=True),
+                UniqueConstraint('site', 'date', name="solaire_data_site_date_key")
                 )
         if self.energy_type in (None, "eolienne"):
             self.eolienne_table = Table(
                 "eolienne_data",
                 self.meta,
                 Column('id', Integer, primary_key=True),
-                Column('date', DateTime, nullable=True, unique=True),
+                Column('site', String, nullable=False, server_default=DEFAULT_SITE["eolienne"]),
+                Column('date', DateTime, nullable=True),
                 Column('prod_eolienne', Float, nullable=True),
                 Column('wind_speed_10m_mean', Float, nullable=True),
                 Column('pressure_msl_mean', Float, nullable=True),
-                Column('temperature_2m_mean', Float, nullable=True)
+                Column('temperature_2m_mean', Float, nullable=True),
+                UniqueConstraint('site', 'date', name="eolienne_data_site_date_key")
                 )
         if self.energy_type in (None, "hydro"):
             self.hydro_table = Table(
                 "hydro_data",
                 self.meta,
                 Column('id', Integer, primary_key=True),
-                Column('date', DateTime, nullable=True, unique=True),
+                Column('site', String, nullable=False, server_default=DEFAULT_SITE["hydro"]),
+                Column('date', DateTime, nullable=True),
                 Column('prod_hydro', Float, nullable=True),
                 Column('QmnJ', Float, nullable=True),
-                Column('HIXnJ', Float, nullable=True)
+                Column('HIXnJ', Float, nullable=True),
+                UniqueConstraint('site', 'date', name="hydro_data_site_date_key")
             )
             
         self.meta.create_all(self.engine)
@@ -61,6 +70,17 @@ class Database():
             conn.execute(text(f'ALTER TABLE "{"public"}"."{self.eolienne_table}" ENABLE ROW LEVEL SECURITY;'))
             conn.execute(text(f'ALTER TABLE "{"public"}"."{self.hydro_table}" ENABLE ROW LEVEL SECURITY;'))
 
+    def migrate_sites(self):
+        """Ajoute la colonne site aux tables existantes et remplace l'unicité sur date par (site, date)"""
+        with self.engine.begin() as conn:
+            for energy_type, site in DEFAULT_SITE.items():
+                if self.energy_type not in (None, energy_type):
+                    continue
+                table = f"{energy_type}_data"
+                conn.execute(text(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS site VARCHAR NOT NULL DEFAULT '{site}'"))
+                conn.execute(text(f"ALTER TABLE {table} DROP CONSTRAINT IF EXISTS {table}_date_key"))
+                conn.execute(text(f"CREATE UNIQUE INDEX IF NOT EXISTS {table}_site_date_key ON {table} (site, date)"))
+
     def drop_tables(self):
         with self.engine.begin() as conn:
             if self.energy_type in (None, "solaire"):
@@ -76,6 +96,21 @@ class Database():
                     self.hydro_table = Table("hydro_data", self.meta, autoload_with=self.engine)
                     self.hydro_table.drop(self.engine, checkfirst=True)
 
+    def site_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Par site, en une seule requête : nombre de lignes, dernière date et somme de la production"""
+        if self.energy_type is None:
+            raise ValueError("site_stats nécessite un energy_type")
+        with self.engine.connect() as conn:
+            rows = conn.execute(text(f"""
+                SELECT site, count(*), max("date"), sum("prod_{self.energy_type}")
+                FROM {self.energy_type}_data
+                GROUP BY site
+            """)).all()
+        return {
+            site: {"rows": count, "last_date": pd.Timestamp(last).isoformat(), "prod_sum": round(float(total or 0), 6)}
+            for site, count, last, total in rows
+        }
+
     def drop_na(self):
         if self.energy_type in (None, "solaire"):
             with self.engine.begin() as conn:
@@ -0,0 +1,165 @@
+from threading import Lock
+from typing import Dict, List
+import json
+import math
+import numpy as np
+from app.model_trainer import ModelTrain
+
+# Seuils usuels du Population Stability Index
+PSI_WARNING = 0.1
+PSI_DRIFT = 0.25
+# Nombre minimal de lignes reçues avant de recommander un réentraînement
+MIN_SAMPLES = 100
+
+
+class StreamingStats:
+    """
+    Statistiques en flux d'une variable, en mémoire constante :
+    moments (algorithme de Welford), extrema et histogramme sur des classes fixes.
+    """
+
+    def __init__(self, edges: List[float], low: float, high: float):
+        self.edges = np.asarray(edges, dtype=float)
+        self.low = low
+        self.high = high
+        self.counts = np.zeros(len(edges) + 1, dtype=np.int64)
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.out_of_range = 0
+
+    def update(self, value: float):
+        value = float(value)
+        if math.isnan(value):
+            return
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        if value < self.low or value > self.high:
+            self.out_of_range += 1
+        self.counts[np.searchsorted(self.edges, value, side="right")] += 1
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.m2 / self.count) if self.count else 0.0
+
+
+def psi(expected: np.ndarray, counts: np.ndarray, eps: float = 1e-4) -> float:
+    """Population Stability Index entre les proportions d'entraînement et celles reçues"""
+    actual = np.clip(counts / counts.sum(), eps, None)
+    expected = np.clip(np.asarray(expected, dtype=float), eps, None)
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+
+class DriftMonitor:
+    """
+    Compare en continu les entrées et prédictions servies au résumé sauvegardé par
+    `ModelTrain.train`. Les statistiques repartent de zéro à chaque nouveau modèle.
+    """
+
+    def __init__(self, producer_type: str, save_dir: str = "saved_models"):
+        self.producer_type = producer_type
+        self.save_dir = save_dir
+        self.reference = None
+        self.stats = {}
+        self._state = None
+        self._lock = Lock()
+
+    def _refresh(self):
+        model_version = ModelTrain.version(self.producer_type, self.save_dir)
+        path = ModelTrain.summary_path(self.producer_type, self.save_dir)
+        try:
+            summary_mtime = path.stat().st_mtime_ns
+        except FileNotFoundError:
+            summary_mtime = None
+        if (model_version, summary_mtime) == self._state:
+            return
+        self._state = (model_version, summary_mtime)
+
+        try:
+            summary = json.loads(path.read_text()) if summary_mtime is not None else None
+        except (FileNotFoundError, json.JSONDecodeError):
+            summary = None
+            self._state = None
+        # Un résumé d'un autre modèle (ou en cours d'écriture) n'est pas une référence valable
+        if summary is None or summary.get("model_version") != model_version:
+            self.reference = None
+            self.stats = {}
+            return
+        self.reference = summary["columns"]
+        self.stats = {
+            name: StreamingStats(column["edges"], column["min"], column["max"])
+            for name, column in self.reference.items()
+        }
+
+    def update(self, rows: List[Dict[str, float]], predictions: List[float]):
+        """Ajoute des lignes servies (entrées + prédiction), O(1) par ligne"""
+        with self._lock:
+            self._refresh()
+            if self.reference is None:
+                return
+            for inputs, prediction in zip(rows, predictions):
+                for name, value in inputs.items():
+                    stats = self.stats.get(name)
+                    if stats is not None:
+                        stats.update(value)
+                self.stats["prediction"].update(prediction)
+
+    def reset(self):
+        with self._lock:
+            self._state = None
+            self._refresh()
+
+    def scores(self) -> Dict[str, object]:
+        with self._lock:
+            self._refresh()
+            if self.reference is None:
+                return {
+                    "energy_type": self.producer_type,
+                    "status": "no_reference",
+                    "detail": "Aucun résumé d'entraînement pour le modèle servi, réentraîner le modèle pour l'activer",
+                }
+
+            columns = {}
+            for name, stats in self.stats.items():
+                if stats.count == 0:
+                    continue
+                reference = self.reference[name]
+                columns[name] = {
+                    "count": stats.count,
+                    "psi": psi(reference["proportions"], stats.counts),
+                    "mean": stats.mean,
+                    "std": stats.std,
+                    "mean_shift": abs(stats.mean - reference["mean"]) / (reference["std"] or 1.0),
+                    "out_of_range_rate": stats.out_of_range / stats.count,
+                    "min": stats.min,
+                    "max": stats.max,
+                }
+
+            samples = self.stats["prediction"].count
+            max_psi = max((column["psi"] for column in columns.values()), default=0.0)
+            if samples < MIN_SAMPLES:
+                status = "insufficient_data"
+            elif max_psi >= PSI_DRIFT:
+                status = "drift"
+            elif max_psi >= PSI_WARNING:
+                status = "warning"
+            else:
+                status = "stable"
+            return {
+                "energy_type": self.producer_type,
+                "model_version": self._state[0],
+                "samples": samples,
+                "max_psi": max_psi,
+                "status": status,
+                "retrain_recommended": status == "drift",
+                "columns": columns,
+            }
+
+
+drift_monitors = {energy_type: DriftMonitor(energy_type) for energy_type in ("hydro", "eolienne", "solaire")}
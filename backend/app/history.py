@@ -0,0 +1,162 @@
+from sqlalchemy import create_engine, text
+from dotenv import load_dotenv
+from typing import Optional
+from datetime import date
+import numpy as np
+import pandas as pd
+import os
+
+load_dotenv()
+
+HISTORY_CONFIG = {
+    "solaire": {
+        "table": "solaire_data",
+        "columns": ["prod_solaire", "global_tilted_irradiance", "temperature_2m"],
+    },
+    "eolienne": {
+        "table": "eolienne_data",
+        "columns": ["prod_eolienne", "wind_speed_10m_mean", "pressure_msl_mean", "temperature_2m_mean"],
+    },
+    "hydro": {
+        "table": "hydro_data",
+        "columns": ["prod_hydro", "QmnJ", "HIXnJ"],
+    },
+}
+# Unités de date_trunc (PostgreSQL) pour chaque fréquence de ré-échantillonnage
+FREQS = {"daily": "day", "weekly": "week", "monthly": "month"}
+
+_engine = None
+
+
+def get_engine():
+    """Moteur SQLAlchemy partagé par les requêtes d'historique (créé au premier appel)"""
+    global _engine
+    if _engine is None:
+        database_url = os.getenv("DATABASE_URL")
+        if not database_url:
+            raise ValueError("Variable d'environnement manquante : DATABASE_URL")
+        _engine = create_engine(database_url, pool_pre_ping=True, pool_size=2, max_overflow=2)
+    return _engine
+
+
+def aggregate(energy_type: str, freq: str = "daily", column: Optional[str] = None,
+              start: Optional[date] = None, end: Optional[date] = None,
+              site: Optional[str] = None) -> pd.DataFrame:
+    """
+    Agrège une table `*_data` dans la base (date_trunc + min/max/moyenne),
+    seules les lignes agrégées sont transférées. Sans `site`, tous les sites du parc sont agrégés.
+    """
+    if energy_type not in HISTORY_CONFIG:
+        raise ValueError(f"energy_type doit être parmi {list(HISTORY_CONFIG)}, reçu: {energy_type}")
+    if freq not in FREQS:
+        raise ValueError(f"freq doit être parmi {list(FREQS)}, reçu: {freq}")
+    config = HISTORY_CONFIG[energy_type]
+    column = column or config["columns"][0]
+    if column not in config["columns"]:
+        raise ValueError(f"column doit être parmi {config['columns']}, reçu: {column}")
+
+    # Table, colonne et unité viennent des listes blanches ci-dessus, les dates sont liées
+    conditions = [f'"{column}" IS NOT NULL', '"date" IS NOT NULL']
+    params = {}
+    if site is not None:
+        conditions.append('"site" = :site')
+        params["site"] = site
+    if start is not None:
+        conditions.append('"date" >= :start')
+        params["start"] = start
+    if end is not None:
+        conditions.append('"date" < :end')
+        params["end"] = end
+    query = text(f"""
+        SELECT date_trunc('{FREQS[freq]}', "date") AS date,
+               avg("{column}") AS mean,
+               min("{column}") AS min,
+               max("{column}") AS max,
+               count("{column}") AS count
+        FROM {config["table"]}
+        WHERE {" AND ".join(conditions)}
+        GROUP BY 1
+        ORDER BY 1
+    """)
+    with get_engine().connect() as conn:
+        return pd.read_sql(query, conn, params=params)
+
+
+def lttb_buckets(n: int, threshold: int) -> np.ndarray:
+    """Début de chaque seau LTTB : premier point, `threshold - 2` seaux intermédiaires, dernier point"""
+    every = (n - 2) / (threshold - 2)
+    return np.concatenate(([0], np.floor(np.arange(threshold - 1) * every).astype(np.int64) + 1))
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets : indices des `threshold` points qui conservent
+    le mieux la forme de la série (premier et dernier points toujours gardés).
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+
+    bounds = np.append(lttb_buckets(n, threshold), n)
+    indices = np.empty(threshold, dtype=np.int64)
+    indices[0] = 0
+    a = 0
+    for i in range(1, threshold - 1):
+        # Moyenne du seau suivant (troisième sommet du triangle)
+        avg_x = x[bounds[i + 1]:bounds[i + 2]].mean()
+        avg_y = y[bounds[i + 1]:bounds[i + 2]].mean()
+        # Point du seau courant formant le plus grand triangle avec `a` et la moyenne
+        start, end = bounds[i], bounds[i + 1]
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        indices[i] = a
+    indices[-1] = n - 1
+    return indices
+
+
+def downsample(df: pd.DataFrame, points: int) -> pd.DataFrame:
+    """
+    Réduit l'historique agrégé à `points` lignes : la moyenne est celle du point choisi
+    par LTTB, min / max / count couvrent tout son seau (les pics ne disparaissent pas).
+    """
+    if len(df) <= points or points < 3:
+        return df
+    dates = pd.to_datetime(df["date"], utc=True)
+    x = (dates - dates.iloc[0]).dt.total_seconds().to_numpy()
+    out = df.iloc[lttb(x, df["mean"].to_numpy(), points)].reset_index(drop=True)
+    bounds = lttb_buckets(len(df), points)
+    out["min"] = np.minimum.reduceat(df["min"].to_numpy(dtype=float), bounds)
+    out["max"] = np.maximum.reduceat(df["max"].to_numpy(dtype=float), bounds)
+    out["count"] = np.add.reduceat(df["count"].to_numpy(dtype=np.int64), bounds)
+    return out
+
+
+def history(energy_type: str, freq: str = "daily", column: Optional[str] = None,
+            start: Optional[date] = None, end: Optional[date] = None, points: int = 1000,
+            site: Optional[str] = None) -> pd.DataFrame:
+    df = aggregate(energy_type, freq, column, start, end, site)
+    return downsample(df, points)
+
+
+def to_columns(df: pd.DataFrame) -> dict:
+    """Format JSON compact : une liste par colonne plutôt qu'un objet par ligne"""
+    dates = pd.to_datetime(df["date"], utc=True).dt.strftime("%Y-%m-%dT%H:%M:%SZ")
+    out = {"date": dates.tolist()}
+    for col in ("mean", "min", "max"):
+        out[col] = df[col].astype(float).round(4).tolist()
+    out["count"] = df["count"].astype(int).tolist()
+    return out
+
+
+def to_arrow_stream(df: pd.DataFrame, batch_size: int = 1024):
+    """Sérialise l'historique en flux Arrow IPC, un lot d'enregistrements à la fois"""
+    import pyarrow as pa
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    yield table.schema.serialize().to_pybytes()
+    for batch in table.to_batches(max_chunksize=batch_size):
+        yield batch.serialize().to_pybytes()
+    # Marqueur de fin de flux IPC
+    yield b"\xff\xff\xff\xff\x00\x00\x00\x00"
@@ -1,8 +1,11 @@
 from fastapi import FastAPI
-from app.routes import hydro, solaire, eolienne
+from app.routes import hydro, solaire, eolienne, cache, history, drift
 
 app = FastAPI(title="API production EnR")
 
 app.include_router(hydro.router, tags=["Hydro"])
 app.include_router(solaire.router, tags=["Solaire"])
-app.include_router(eolienne.router, tags=["Eolienne"])
\ No newline at end of file
+app.include_router(eolienne.router, tags=["Eolienne"])
+app.include_router(cache.router, tags=["Cache"])
+app.include_router(history.router, tags=["Historique"])
+app.include_router(drift.router, tags=["Dérive"])
\ No newline at end of file
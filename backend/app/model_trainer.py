@@ -1,12 +1,18 @@
 import pandas as pd
 import numpy as np
 import joblib
+import hashlib
+import json
+import os
 from sklearn.model_selection import TimeSeriesSplit, RandomizedSearchCV, cross_val_score
 from sklearn.metrics import r2_score, mean_absolute_error, mean_squared_error
 from sklearn.ensemble import RandomForestRegressor
 from pathlib import Path
 from typing import List, Dict, Any
 
+# Empreinte de chaque fichier modèle, indexée par chemin : ((inode, mtime, taille), sha256)
+_versions = {}
+
 class ModelTrain:
     def __init__(self, producer_type: str,
                  features: List[str],
@@ -86,9 +92,7 @@ class ModelTrain:
         self.metrics["R2_CV_std"] = np.std(cv_scores)
         
         # Sauvegarde du modèle
-        model_path = self.save_dir / f"{self.producer_type}_random_forest_model.pkl"
-        joblib.dump(self.model, model_path)
-        print(f"Modèle sauvegardé ici : {model_path}")
+        self.save(data)
         
         # Affichage résultats
         print("\n--- Résultats d'entraînement ---")
@@ -102,6 +106,54 @@ class ModelTrain:
 
         return self.metrics
     
+    def fit(self, data: pd.DataFrame, params: Dict[str, Any] = None, n_jobs: int = -1) -> RandomForestRegressor:
+        """Entraîne le modèle avec des hyperparamètres fixés, sans recherche ni sauvegarde"""
+        self.model = RandomForestRegressor(random_state=self.random_state, n_jobs=n_jobs, **(params or {}))
+        self.model.fit(data[self.features], data[self.target])
+        return self.model
+
+    def save(self, data: pd.DataFrame) -> Path:
+        """Sauvegarde le modèle et le résumé de ses données d'entraînement (référence du suivi de dérive)"""
+        # Écriture dans un fichier temporaire puis remplacement : l'API ne lit jamais un fichier partiel
+        model_path = self.model_path(self.producer_type, self.save_dir)
+        tmp_path = model_path.with_name(model_path.name + ".tmp")
+        joblib.dump(self.model, tmp_path)
+        os.replace(tmp_path, model_path)
+        print(f"Modèle sauvegardé ici : {model_path}")
+
+        summary_path = self.summary_path(self.producer_type, self.save_dir)
+        tmp_path = summary_path.with_name(summary_path.name + ".tmp")
+        tmp_path.write_text(json.dumps(self.summarize(data)))
+        os.replace(tmp_path, summary_path)
+        print(f"Résumé des données d'entraînement sauvegardé ici : {summary_path}")
+        return model_path
+
+    def summarize(self, data: pd.DataFrame, n_bins: int = 10) -> Dict[str, Any]:
+        """
+        Résumé des distributions d'entraînement (features et prédictions du modèle) :
+        moments et histogramme sur des classes de quantiles fixes.
+        """
+        if self.model is None:
+            raise ValueError("Le modèle n'a pas été entrainé ou chargé.")
+        columns = {name: data[name].to_numpy(dtype=float) for name in self.features}
+        columns["prediction"] = self.model.predict(data[self.features])
+
+        summary = {"model_version": self.version(self.producer_type, self.save_dir), "columns": {}}
+        for name, values in columns.items():
+            values = values[~np.isnan(values)]
+            edges = np.unique(np.quantile(values, np.linspace(0, 1, n_bins + 1)[1:-1]))
+            counts = np.bincount(np.searchsorted(edges, values, side="right"), minlength=len(edges) + 1)
+            summary["columns"][name] = {
+                "count": int(len(values)),
+                "mean": float(values.mean()),
+                "std": float(values.std()),
+                "min": float(values.min()),
+                "max": float(values.max()),
+                "edges": edges.tolist(),
+                "proportions": (counts / counts.sum()).tolist(),
+            }
+        return summary
+
     def predict(self, X_new: pd.DataFrame) -> np.ndarray:
         if self.model is None:
             raise ValueError("Le modèle n'a pas été entrainé ou chargé.")
@@ -110,10 +162,40 @@ class ModelTrain:
         X_new_ordered = X_new[self.features]
         return self.model.predict(X_new_ordered)
     
+    @staticmethod
+    def model_path(producer_type: str, save_dir="saved_models") -> Path:
+        return Path(__file__).resolve().parent / save_dir / f"{producer_type}_random_forest_model.pkl"
+
+    @staticmethod
+    def summary_path(producer_type: str, save_dir="saved_models") -> Path:
+        return Path(__file__).resolve().parent / save_dir / f"{producer_type}_training_summary.json"
+
+    @classmethod
+    def version(cls, producer_type: str, save_dir="saved_models") -> str | None:
+        """
+        Identifiant du modèle sauvegardé : empreinte sha256 du fichier .pkl, None si absent.
+        Le contenu n'est relu que si le fichier a changé (inode, date, taille) : l'identifiant
+        survit à un git checkout ou une copie, et reste peu coûteux à chaque prédiction.
+        """
+        path = cls.model_path(producer_type, save_dir)
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            return None
+        key = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        cached = _versions.get(path)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        _versions[path] = (key, digest.hexdigest()[:16])
+        return _versions[path][1]
+
     @classmethod
     def load(cls, producer_type, features, target, save_dir="saved_models"):
-        base_dir = Path(__file__).parent 
-        model_path = base_dir / save_dir / f"{producer_type}_random_forest_model.pkl"
+        model_path = cls.model_path(producer_type, save_dir)
 
         if not model_path.exists():
             raise FileNotFoundError(f"Modèle non trouvé: {model_path}")
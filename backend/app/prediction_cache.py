@@ -0,0 +1,131 @@
+from collections import OrderedDict
+from threading import Lock
+from typing import Callable, Dict, List, Optional
+import os
+import pandas as pd
+from app.model_trainer import ModelTrain
+
+
+class PredictionCache:
+    """
+    Cache LRU des prédictions, indexé par (type d'énergie, version du modèle, entrées).
+
+    - La version est celle du fichier .pkl sauvegardé : un nouvel entraînement invalide
+      automatiquement les prédictions et le modèle gardés en mémoire.
+    - Avec `decimals`, les entrées sont arrondies avant d'être utilisées comme clé et
+      pour la prédiction, des requêtes quasi identiques partagent donc le même résultat.
+    """
+
+    def __init__(self, maxsize: int = 1024, decimals: Optional[int] = None):
+        if maxsize <= 0:
+            raise ValueError(f"maxsize doit être supérieur à 0, reçu: {maxsize}")
+        self.maxsize = maxsize
+        self.decimals = decimals
+        self._predictions = OrderedDict()
+        self._models = {}
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _quantise(self, inputs: Dict[str, float]) -> Dict[str, float]:
+        if self.decimals is None:
+            return dict(inputs)
+        return {name: round(float(value), self.decimals) for name, value in inputs.items()}
+
+    def _model(self, producer_type: str, features: List[str], target: str, version: str) -> ModelTrain:
+        cached = self._models.get(producer_type)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        model = ModelTrain.load(producer_type, features, target)
+        with self._lock:
+            if cached is not None:
+                self._invalidate(producer_type)
+            self._models[producer_type] = (version, model)
+        return model
+
+    def predict(self, producer_type: str, features: List[str], target: str,
+                inputs: Dict[str, float],
+                prepare: Optional[Callable[[pd.DataFrame], pd.DataFrame]] = None) -> float:
+        """Retourne la prédiction en cache ou la calcule (`prepare` ajoute les features dérivées)"""
+        return self.predict_many(producer_type, features, target, [inputs], prepare)[0]
+
+    def predict_many(self, producer_type: str, features: List[str], target: str,
+                     rows: List[Dict[str, float]],
+                     prepare: Optional[Callable[[pd.DataFrame], pd.DataFrame]] = None) -> List[float]:
+        """Comme `predict` pour un lot : les entrées absentes du cache sont prédites en un seul appel"""
+        version = ModelTrain.version(producer_type)
+        if version is None:
+            raise FileNotFoundError(f"Modèle non trouvé: {ModelTrain.model_path(producer_type)}")
+        rows = [self._quantise(inputs) for inputs in rows]
+        keys = [(producer_type, version, tuple(sorted(inputs.items()))) for inputs in rows]
+
+        predictions = [None] * len(rows)
+        missing = {}
+        with self._lock:
+            for i, key in enumerate(keys):
+                prediction = self._predictions.get(key)
+                if prediction is None:
+                    missing.setdefault(key, []).append(i)
+                    continue
+                self._predictions.move_to_end(key)
+                self.hits += 1
+                predictions[i] = prediction
+        if not missing:
+            return predictions
+
+        model = self._model(producer_type, features, target, version)
+        df = pd.DataFrame([rows[positions[0]] for positions in missing.values()])
+        if prepare is not None:
+            df = prepare(df)
+        computed = model.predict(df)
+
+        with self._lock:
+            for (key, positions), prediction in zip(missing.items(), computed):
+                prediction = float(prediction)
+                for i in positions:
+                    predictions[i] = prediction
+                self.misses += len(positions)
+                self._predictions[key] = prediction
+            while len(self._predictions) > self.maxsize:
+                self._predictions.popitem(last=False)
+                self.evictions += 1
+        return predictions
+
+    def _invalidate(self, producer_type: Optional[str]):
+        stale = [key for key in self._predictions if producer_type is None or key[0] == producer_type]
+        for key in stale:
+            del self._predictions[key]
+        if producer_type is None:
+            self._models.clear()
+        else:
+            self._models.pop(producer_type, None)
+        self.invalidations += 1
+
+    def invalidate(self, producer_type: Optional[str] = None):
+        """Vide le cache d'un type d'énergie (ou de tous si None)"""
+        with self._lock:
+            self._invalidate(producer_type)
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            requests = self.hits + self.misses
+            return {
+                "size": len(self._predictions),
+                "maxsize": self.maxsize,
+                "decimals": self.decimals,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / requests if requests else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "model_versions": {name: version for name, (version, _) in self._models.items()},
+            }
+
+
+_decimals = os.getenv("PREDICTION_CACHE_DECIMALS")
+prediction_cache = PredictionCache(
+    maxsize=int(os.getenv("PREDICTION_CACHE_SIZE", "1024")),
+    decimals=int(_decimals) if _decimals else None,
+)
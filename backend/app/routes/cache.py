@@ -0,0 +1,14 @@
+from fastapi import APIRouter
+from typing import Literal, Optional
+from app.prediction_cache import prediction_cache
+
+router = APIRouter()
+
+@router.get("/cache/stats")
+def cache_stats():
+    return prediction_cache.stats()
+
+@router.post("/cache/clear")
+def cache_clear(energy_type: Optional[Literal["hydro", "eolienne", "solaire"]] = None):
+    prediction_cache.invalidate(energy_type)
+    return prediction_cache.stats()
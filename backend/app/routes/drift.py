@@ -0,0 +1,18 @@
+from fastapi import APIRouter
+from typing import Literal
+from app.drift_monitor import drift_monitors
+
+router = APIRouter()
+
+@router.get("/drift")
+def drift_all():
+    return {energy_type: monitor.scores() for energy_type, monitor in drift_monitors.items()}
+
+@router.get("/drift/{energy_type}")
+def drift(energy_type: Literal["hydro", "eolienne", "solaire"]):
+    return drift_monitors[energy_type].scores()
+
+@router.post("/drift/{energy_type}/reset")
+def drift_reset(energy_type: Literal["hydro", "eolienne", "solaire"]):
+    drift_monitors[energy_type].reset()
+    return drift_monitors[energy_type].scores()
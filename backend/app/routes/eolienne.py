@@ -1,26 +1,52 @@
 from fastapi import APIRouter
 from pydantic import BaseModel
 import pandas as pd
-from app.model_trainer import ModelTrain
+from typing import List, Optional
+from app.prediction_cache import prediction_cache
+from app.drift_monitor import drift_monitors
 
 
 router = APIRouter()
 
+FEATURES = ["wind_speed_10m_mean", "pressure_msl_mean", "temperature_2m_mean", "wind_speed3", "temp_press"]
+
 class EolienneInput(BaseModel):
     wind_speed_10m_mean: float
     pressure_msl_mean: float
     temperature_2m_mean: float
 
+class EolienneSiteInput(EolienneInput):
+    site: Optional[str] = None
+
+class EolienneBatchInput(BaseModel):
+    inputs: List[EolienneSiteInput]
+
+def add_features(df: pd.DataFrame) -> pd.DataFrame:
+    # Création des features 
+    df['wind_speed3'] = df['wind_speed_10m_mean']**3
+    df['temp_press'] = df['temperature_2m_mean']*df['pressure_msl_mean']
+    return df
+
+def feature_rows(rows: List[dict]) -> List[dict]:
+    # Lignes complètes (features dérivées comprises) pour le suivi de dérive
+    return add_features(pd.DataFrame(rows)).to_dict(orient="records")
+
 @router.post("/predict/eolienne")
 def predict_wind(data: EolienneInput):
     if data.wind_speed_10m_mean == 0 or data.pressure_msl_mean == 0 or data.temperature_2m_mean == 0:
         return {"error": " wind_speed_10m_mean, pressure_msl_mean et temperature_2m_mean doit être supérieur à 0"}
     
-    df = pd.DataFrame([data.model_dump()])
-    # Création des features 
-    df['wind_speed3'] = df['wind_speed_10m_mean']**3
-    df['temp_press'] = df['temperature_2m_mean']*df['pressure_msl_mean']
-    
-    model = ModelTrain.load("eolienne", ["wind_speed_10m_mean", "pressure_msl_mean", "temperature_2m_mean", "wind_speed3", "temp_press"], "prod_eolienne")
-    prediction = model.predict(df)[0]
-    return {"prediction": prediction}
\ No newline at end of file
+    prediction = prediction_cache.predict("eolienne", FEATURES, "prod_eolienne", data.model_dump(), prepare=add_features)
+    drift_monitors["eolienne"].update(feature_rows([data.model_dump()]), [prediction])
+    return {"prediction": prediction}
+
+@router.post("/predict/eolienne/batch")
+def predict_wind_batch(data: EolienneBatchInput):
+    rows = [row.model_dump(exclude={"site"}) for row in data.inputs]
+    if any(0 in row.values() for row in rows):
+        return {"error": " wind_speed_10m_mean, pressure_msl_mean et temperature_2m_mean doit être supérieur à 0"}
+
+    # Tous les sites sont prédits en un seul appel au modèle
+    predictions = prediction_cache.predict_many("eolienne", FEATURES, "prod_eolienne", rows, prepare=add_features)
+    drift_monitors["eolienne"].update(feature_rows(rows), predictions)
+    return {"predictions": [{"site": row.site, "prediction": pred} for row, pred in zip(data.inputs, predictions)]}
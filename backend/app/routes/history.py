@@ -0,0 +1,37 @@
+from fastapi import APIRouter, Query
+from fastapi.responses import StreamingResponse
+from typing import Literal, Optional
+from datetime import date
+from app import history as history_data
+
+router = APIRouter()
+
+@router.get("/history/{energy_type}")
+def get_history(energy_type: Literal["hydro", "eolienne", "solaire"],
+                freq: Literal["daily", "weekly", "monthly"] = "daily",
+                column: Optional[str] = None,
+                start: Optional[date] = None,
+                end: Optional[date] = None,
+                site: Optional[str] = None,
+                points: int = Query(1000, ge=3, le=20000),
+                format: Literal["json", "arrow"] = "json"):
+    columns = history_data.HISTORY_CONFIG[energy_type]["columns"]
+    if column is not None and column not in columns:
+        return {"error": f"column doit être parmi {columns}"}
+    if format == "arrow":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            return {"error": "Format arrow indisponible : pyarrow n'est pas installé"}
+
+    df = history_data.history(energy_type, freq, column, start, end, points, site)
+    if format == "arrow":
+        return StreamingResponse(history_data.to_arrow_stream(df), media_type="application/vnd.apache.arrow.stream")
+    return {
+        "energy_type": energy_type,
+        "freq": freq,
+        "column": column or columns[0],
+        "site": site,
+        "points": len(df),
+        **history_data.to_columns(df),
+    }
@@ -1,20 +1,39 @@
 from fastapi import APIRouter
 from pydantic import BaseModel
-import pandas as pd
-from app.model_trainer import ModelTrain
+from typing import List, Optional
+from app.prediction_cache import prediction_cache
+from app.drift_monitor import drift_monitors
 
 router = APIRouter()
 
+FEATURES = ["QmnJ", "HIXnJ"]
+
 class HydroInput(BaseModel):
     QmnJ: float
     HIXnJ: float
 
+class HydroSiteInput(HydroInput):
+    site: Optional[str] = None
+
+class HydroBatchInput(BaseModel):
+    inputs: List[HydroSiteInput]
+
 @router.post("/predict/hydro")
 def predict_hydro(data: HydroInput):
     if data.QmnJ == 0 or data.HIXnJ == 0:
         return {"error": "QmnJ et HIXnJ devraient être supérieur à 0"}
     
-    df = pd.DataFrame([data.model_dump()])
-    model = ModelTrain.load("hydro", ["QmnJ", "HIXnJ"], "prod_hydro")
-    prediction = model.predict(df)[0]
+    prediction = prediction_cache.predict("hydro", FEATURES, "prod_hydro", data.model_dump())
+    drift_monitors["hydro"].update([data.model_dump()], [prediction])
     return {"prediction": prediction}
+
+@router.post("/predict/hydro/batch")
+def predict_hydro_batch(data: HydroBatchInput):
+    rows = [row.model_dump(exclude={"site"}) for row in data.inputs]
+    if any(0 in row.values() for row in rows):
+        return {"error": "QmnJ et HIXnJ devraient être supérieur à 0"}
+
+    # Tous les sites sont prédits en un seul appel au modèle
+    predictions = prediction_cache.predict_many("hydro", FEATURES, "prod_hydro", rows)
+    drift_monitors["hydro"].update(rows, predictions)
+    return {"predictions": [{"site": row.site, "prediction": pred} for row, pred in zip(data.inputs, predictions)]}
@@ -1,20 +1,39 @@
 from fastapi import APIRouter
 from pydantic import BaseModel
-import pandas as pd
-from app.model_trainer import ModelTrain
+from typing import List, Optional
+from app.prediction_cache import prediction_cache
+from app.drift_monitor import drift_monitors
 
 router = APIRouter()
 
+FEATURES = ["global_tilted_irradiance", "temperature_2m"]
+
 class SolaireInput(BaseModel):
     global_tilted_irradiance: float
     temperature_2m: float
 
+class SolaireSiteInput(SolaireInput):
+    site: Optional[str] = None
+
+class SolaireBatchInput(BaseModel):
+    inputs: List[SolaireSiteInput]
+
 @router.post("/predict/solaire")
 def predict_solar(data: SolaireInput):
     if data.global_tilted_irradiance == 0 or data.temperature_2m == 0:
         return {"error": "global_tilted_irradiance et temperature_2m doit être supérieur à 0"}
     
-    df = pd.DataFrame([data.model_dump()])
-    model = ModelTrain.load("solaire", ["global_tilted_irradiance", "temperature_2m"], "prod_solaire")
-    prediction = model.predict(df)[0]
+    prediction = prediction_cache.predict("solaire", FEATURES, "prod_solaire", data.model_dump())
+    drift_monitors["solaire"].update([data.model_dump()], [prediction])
     return {"prediction": prediction}
+
+@router.post("/predict/solaire/batch")
+def predict_solar_batch(data: SolaireBatchInput):
+    rows = [row.model_dump(exclude={"site"}) for row in data.inputs]
+    if any(0 in row.values() for row in rows):
+        return {"error": "global_tilted_irradiance et temperature_2m doit être supérieur à 0"}
+
+    # Tous les sites sont prédits en un seul appel au modèle
+    predictions = prediction_cache.predict_many("solaire", FEATURES, "prod_solaire", rows)
+    drift_monitors["solaire"].update(rows, predictions)
+    return {"predictions": [{"site": row.site, "prediction": pred} for row, pred in zip(data.inputs, predictions)]}
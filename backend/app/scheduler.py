@@ -0,0 +1,426 @@
+# backend/app/scheduler.py
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from contextlib import ExitStack, nullcontext
+from functools import partial
+from threading import Event, Lock
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+import pandas as pd
+import argparse
+import hashlib
+import json
+import logging
+import os
+import signal
+import sys
+import tempfile
+import time
+
+import requests
+from dotenv import load_dotenv
+
+# handlers/ (et benchmarks/ en mode simulé) s'importent depuis la racine du dépôt
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT))
+
+from model_trainer import ModelTrain
+from train_models import ENERGY_CONFIG, load_data
+
+logger = logging.getLogger("scheduler")
+
+OPENMETEO_API_URL = "https://archive-api.open-meteo.com/v1/archive"
+# Nombre de lignes envoyées par requête d'upsert
+UPSERT_BATCH_SIZE = 5000
+# Jours rechargés avant la dernière date en base (révisions tardives des APIs)
+OVERLAP_DAYS = 7
+
+
+def fingerprint(value: Any) -> str:
+    """Empreinte du résultat d'une étape, pour savoir si les étapes suivantes doivent tourner"""
+    if isinstance(value, pd.DataFrame):
+        data = pd.util.hash_pandas_object(value, index=False).to_numpy().tobytes()
+        data += json.dumps(list(map(str, value.columns))).encode()
+    else:
+        data = json.dumps(value, sort_keys=True, default=str).encode()
+    return hashlib.sha256(data).hexdigest()[:16]
+
+
+class Job:
+    def __init__(self, name: str,
+                 fn: Callable[..., Any],
+                 deps: List[str] = None,
+                 retries: int = 3,
+                 backoff: float = 2.0,
+                 lock: Optional[Lock] = None,
+                 verify: Optional[Callable[[Any], bool]] = None):
+        self.name = name
+        self.fn = fn
+        self.deps = deps or []
+        self.retries = retries
+        self.backoff = backoff
+        # Verrou partagé entre étapes qui ne doivent pas tourner en même temps (entraînements)
+        self.lock = lock
+        # Vérifie que ce que l'étape a produit existe toujours (reçoit le résultat enregistré)
+        self.verify = verify
+
+    def execute(self, *inputs) -> Any:
+        """Exécute l'étape avec nouvelles tentatives (délai exponentiel) et journalise les durées"""
+        for attempt in range(self.retries + 1):
+            try:
+                with self.lock or nullcontext():
+                    start = time.perf_counter()
+                    result = self.fn(*inputs)
+            except Exception as e:
+                elapsed = time.perf_counter() - start
+                if attempt == self.retries:
+                    logger.error("[%s] échec après %d tentative(s) (%.2fs) : %s", self.name, attempt + 1, elapsed, e)
+                    raise
+                delay = self.backoff * 2 ** attempt
+                logger.warning("[%s] tentative %d échouée (%.2fs) : %s, nouvel essai dans %.1fs",
+                               self.name, attempt + 1, elapsed, e, delay)
+                time.sleep(delay)
+                continue
+            logger.info("[%s] terminé en %.2fs", self.name, time.perf_counter() - start)
+            return result
+
+
+class JobGraph:
+    """
+    Graphe d'étapes : chaque étape reçoit les résultats de ses dépendances,
+    les branches indépendantes tournent en parallèle et une étape dont les entrées
+    n'ont pas changé depuis le dernier succès est sautée (avec toute sa descendance).
+    """
+
+    def __init__(self, state_path: Optional[Path] = None, max_workers: int = 4):
+        self.jobs: Dict[str, Job] = {}
+        self.state_path = state_path
+        self.max_workers = max_workers
+        self.state = {}
+        if state_path is not None and state_path.exists():
+            self.state = json.loads(state_path.read_text())
+
+    def add(self, name: str, fn: Callable[..., Any], deps: List[str] = None, **kwargs) -> Job:
+        # Les dépendances doivent exister : le graphe reste acyclique par construction
+        for dep in deps or []:
+            if dep not in self.jobs:
+                raise ValueError(f"Dépendance inconnue pour {name} : {dep}")
+        self.jobs[name] = Job(name, fn, deps, **kwargs)
+        return self.jobs[name]
+
+    def descendants(self, name: str) -> set:
+        found = set()
+        for job in self.jobs.values():
+            if name in job.deps:
+                found |= {job.name} | self.descendants(job.name)
+        return found
+
+    def _outputs_exist(self, name: str) -> bool:
+        job = self.jobs[name]
+        if job.verify is None:
+            return True
+        try:
+            return bool(job.verify(self.state[name].get("result")))
+        except Exception as e:
+            logger.warning("[%s] vérification des sorties impossible : %s", name, e)
+            return False
+
+    def _up_to_date(self, job: Job, input_fp: str) -> bool:
+        # Les étapes sources (sans dépendance) interrogent l'extérieur : elles tournent toujours
+        if not job.deps:
+            return False
+        if self.state.get(job.name, {}).get("input") != input_fp:
+            return False
+        branch = [job.name, *self.descendants(job.name)]
+        if any(self.state.get(name, {}).get("status") != "done" for name in branch):
+            return False
+        if all(self._outputs_exist(name) for name in branch):
+            return True
+        # Modèle supprimé, table vidée... : l'état ne correspond plus, toute la branche est relancée
+        logger.warning("[%s] sorties manquantes ou modifiées, la branche est relancée", job.name)
+        for name in branch:
+            self.state.pop(name, None)
+        return False
+
+    def _save_state(self):
+        if self.state_path is None:
+            return
+        tmp_path = self.state_path.with_name(self.state_path.name + ".tmp")
+        tmp_path.write_text(json.dumps(self.state, indent=2))
+        os.replace(tmp_path, self.state_path)
+
+    def run(self) -> Dict[str, str]:
+        """Exécute le graphe, retourne le statut de chaque étape (done, skipped, failed, upstream_failed)"""
+        statuses, outputs, fps = {}, {}, {}
+        pending = dict(self.jobs)
+        running = {}
+        start = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while pending or running:
+                progress = True
+                while progress:
+                    progress = False
+                    for name, job in list(pending.items()):
+                        dep_statuses = [statuses.get(dep) for dep in job.deps]
+                        if any(status is None for status in dep_statuses):
+                            continue
+                        del pending[name]
+                        progress = True
+                        if any(status in ("failed", "upstream_failed") for status in dep_statuses):
+                            statuses[name] = "upstream_failed"
+                            logger.warning("[%s] non exécuté : une dépendance a échoué", name)
+                            continue
+                        input_fp = fingerprint([fps[dep] for dep in job.deps])
+                        if "skipped" in dep_statuses or self._up_to_date(job, input_fp):
+                            statuses[name] = "skipped"
+                            fps[name] = self.state[name]["output"]
+                            logger.info("[%s] sauté : entrées inchangées", name)
+                            continue
+                        future = executor.submit(job.execute, *[outputs[dep] for dep in job.deps])
+                        running[future] = (name, input_fp)
+                        logger.info("[%s] démarré", name)
+
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name, input_fp = running.pop(future)
+                    finished_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+                    try:
+                        result = future.result()
+                    except Exception:
+                        statuses[name] = "failed"
+                        self.state[name] = {"status": "failed", "input": input_fp, "finished_at": finished_at}
+                        continue
+                    outputs[name] = result
+                    # Une étape sans résultat (écriture en base...) transmet l'empreinte de ses entrées
+                    fps[name] = input_fp if result is None else fingerprint(result)
+                    statuses[name] = "done"
+                    self.state[name] = {"status": "done", "input": input_fp, "output": fps[name],
+                                        "finished_at": finished_at}
+                    # Résultats courts (versions, métriques) gardés pour vérifier les sorties plus tard
+                    if isinstance(result, dict):
+                        self.state[name]["result"] = result
+
+        self._save_state()
+        logger.info("Graphe exécuté en %.2fs : %s", time.perf_counter() - start,
+                    ", ".join(f"{name}={status}" for name, status in statuses.items()))
+        return statuses
+
+
+# --- Étapes du pipeline ----------------------------------------------------------------
+
+def fetch(handler, database, start_date: Optional[str], end_date: Optional[str],
+          overlap_days: int) -> pd.DataFrame:
+    """
+    Charge [dernière date en base - overlap_days, end_date] (fin par défaut : aujourd'hui).
+    Un `start_date` explicite (rattrapage) est utilisé tel quel, un site sans historique
+    fait repartir le chargement du début par défaut du handler.
+    """
+    if start_date is None:
+        # Dernière date de chaque site en une requête, quel que soit le nombre de sites
+        stats = database.site_stats()
+        if all(site["site"] in stats for site in handler.sites):
+            last = min(pd.Timestamp(stats[site["site"]]["last_date"]) for site in handler.sites)
+            start_date = (last - pd.Timedelta(days=overlap_days)).strftime("%Y-%m-%d")
+    handler.start_date, handler.end_date = start_date, end_date
+    logger.info("[%s] période chargée : %s → %s", handler.energy_type, *handler.window())
+    return handler.load()
+
+
+def clean(handler, df: pd.DataFrame) -> pd.DataFrame:
+    return handler.clean(df)
+
+
+def load(client, table_name: str, df: pd.DataFrame):
+    records = df.to_dict(orient="records")
+    for start in range(0, len(records), UPSERT_BATCH_SIZE):
+        client.table(table_name).upsert(records[start:start + UPSERT_BATCH_SIZE], on_conflict="site,date").execute()
+    logger.info("%d lignes envoyées dans %s", len(records), table_name)
+
+
+def drop_na(database, _loaded=None) -> Dict[str, Dict[str, Any]]:
+    """
+    Supprime les lignes incomplètes et retourne l'état de la table d'entraînement par site
+    (lignes, dernière date, somme de la production) : le réentraînement n'est relancé que
+    si ces données changent, pas à chaque nouveau jour de météo sans production.
+    """
+    database.drop_na()
+    return database.site_stats()
+
+
+def retrain(energy_type: str, client, staging_dir: str, n_iter_search: int, _cleaned=None) -> Dict[str, Any]:
+    """Entraîne le modèle dans le dossier de préparation, sans toucher au modèle servi"""
+    df = load_data(energy_type, client)
+    if df.empty:
+        raise ValueError(f"Aucune donnée d'entraînement pour {energy_type}")
+    config = ENERGY_CONFIG[energy_type]
+    trainer = ModelTrain(energy_type, config["features"], config["target"], save_dir=staging_dir)
+    metrics = trainer.train(df, n_iter_search=n_iter_search)
+    return {
+        "version": ModelTrain.version(energy_type, staging_dir),
+        "R2_test": float(metrics["R2_test"]),
+        "RMSE": float(metrics["RMSE"]),
+    }
+
+
+def hot_swap(energy_type: str, staging_dir: str, save_dir: str,
+             api_url: Optional[str], min_r2: Optional[float], result: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Remplace le modèle servi par celui du dossier de préparation (os.replace, atomique).
+    Le résumé passe en premier : l'API ne l'utilise qu'une fois le modèle correspondant en place.
+    """
+    if min_r2 is not None and result["R2_test"] < min_r2:
+        logger.warning("[%s] modèle rejeté : R² test %.3f < %.3f, le modèle servi est conservé",
+                       energy_type, result["R2_test"], min_r2)
+        return {"swapped": False, "served_version": ModelTrain.version(energy_type, save_dir), **result}
+
+    for path in (ModelTrain.summary_path, ModelTrain.model_path):
+        os.replace(path(energy_type, staging_dir), path(energy_type, save_dir))
+    logger.info("[%s] nouveau modèle en service : %s", energy_type, ModelTrain.version(energy_type, save_dir))
+
+    # Le cache de l'API détecte déjà la nouvelle version, on libère tout de suite les anciennes entrées
+    if api_url:
+        try:
+            requests.post(f"{api_url}/cache/clear", params={"energy_type": energy_type}, timeout=10).raise_for_status()
+        except requests.exceptions.RequestException as e:
+            logger.warning("[%s] API non notifiée (%s) : le cache se mettra à jour au prochain appel", energy_type, e)
+    return {"swapped": True, "served_version": ModelTrain.version(energy_type, save_dir), **result}
+
+
+# --- Vérification des sorties (une étape sautée doit avoir laissé ses sorties en place) ---
+
+def table_loaded(database, sites: List[dict], _result=None) -> bool:
+    stats = database.site_stats()
+    return all(site["site"] in stats for site in sites)
+
+
+def model_trained(energy_type: str, save_dir: str, staging_dir: str, result: Dict[str, Any]) -> bool:
+    """Le modèle entraîné est servi, ou attend dans le dossier de préparation s'il a été rejeté"""
+    return result["version"] in (ModelTrain.version(energy_type, save_dir), ModelTrain.version(energy_type, staging_dir))
+
+
+def model_served(energy_type: str, save_dir: str, result: Dict[str, Any]) -> bool:
+    return result["served_version"] is not None and result["served_version"] == ModelTrain.version(energy_type, save_dir)
+
+
+def build_graph(graph: JobGraph, energy_types: List[str], handler_factory: Callable[[str], Any],
+                database_factory: Callable[[str], Any], client, save_dir: str,
+                api_url: str = None, min_r2: float = None, n_iter_search: int = 20,
+                retries: int = 3, backoff: float = 2.0, start_date: str = None, end_date: str = None,
+                overlap_days: int = OVERLAP_DAYS) -> JobGraph:
+    """fetch → clean → load → drop_na → retrain → hot_swap, une branche par type d'énergie"""
+    train_lock = Lock()
+    options = {"retries": retries, "backoff": backoff}
+    staging_dir = str(Path(save_dir) / "staging")
+    for energy_type in energy_types:
+        handler = handler_factory(energy_type)
+        database = database_factory(energy_type)
+        table_name = ENERGY_CONFIG[energy_type]["table"]
+        step = lambda name: f"{energy_type}.{name}"
+        graph.add(step("fetch"), partial(fetch, handler, database, start_date, end_date, overlap_days), **options)
+        graph.add(step("clean"), partial(clean, handler), [step("fetch")], **options)
+        graph.add(step("load"), partial(load, client, table_name), [step("clean")],
+                  verify=partial(table_loaded, database, handler.sites), **options)
+        graph.add(step("drop_na"), partial(drop_na, database), [step("load")], **options)
+        # Un entraînement occupe tous les coeurs : un seul à la fois
+        graph.add(step("retrain"), partial(retrain, energy_type, client, staging_dir, n_iter_search),
+                  [step("drop_na")], lock=train_lock,
+                  verify=partial(model_trained, energy_type, save_dir, staging_dir), **options)
+        graph.add(step("hot_swap"), partial(hot_swap, energy_type, staging_dir, save_dir, api_url, min_r2),
+                  [step("retrain")], verify=partial(model_served, energy_type, save_dir), **options)
+    return graph
+
+
+def main(energy_types: List[str], interval: float, once: bool = False, use_mock: bool = False,
+         save_dir: str = None, state_path: str = None, sites_path: str = None, api_url: str = None,
+         min_r2: float = None, n_iter_search: int = 20, workers: int = 4, retries: int = 3, backoff: float = 2.0,
+         start_date: str = None, end_date: str = None, overlap_days: int = OVERLAP_DAYS):
+    load_dotenv()
+    with ExitStack() as stack:
+        if use_mock:
+            # Doublures des benchmarks, chargées uniquement en mode simulé
+            from benchmarks.mock_scheduler import mock_upstreams
+            tmp = stack.enter_context(tempfile.TemporaryDirectory(prefix="scheduler_mock_"))
+            save_dir = save_dir or str(Path(tmp) / "models")
+            client, database_factory = mock_upstreams(stack, energy_types)
+            url, key, database_url = "http://mock", "mock", None
+            logger.info("Mode simulé : modèles sauvegardés dans %s", save_dir)
+        else:
+            url = os.getenv("SUPABASE_URL")
+            key = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+            database_url = os.getenv("DATABASE_URL")
+            if not url or not key or not database_url:
+                raise ValueError("Variables d'environnement manquantes : SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY ou DATABASE_URL")
+            save_dir = save_dir or "saved_models"
+            from database_manager import Database
+            database_factory = lambda energy_type: Database(url, key, database_url, energy_type)
+            client = None
+
+        from handlers.datahandler import APIDataHandler, HYDRO_API_URL, load_sites
+
+        sites = {}
+        if sites_path:
+            # Une liste de sites ne décrit qu'un type d'énergie, un dictionnaire peut les couvrir tous
+            if isinstance(load_sites(sites_path), list) and len(energy_types) > 1:
+                raise ValueError(f"{sites_path} contient une liste de sites : préciser un seul type d'énergie "
+                                 'ou utiliser {"solaire": [...], "hydro": [...]}')
+            sites = {energy_type: load_sites(sites_path, energy_type) for energy_type in energy_types}
+        api_urls = {"hydro": HYDRO_API_URL, "solaire": OPENMETEO_API_URL, "eolienne": OPENMETEO_API_URL}
+        handler_factory = lambda energy_type: APIDataHandler(url, key, energy_type, api_urls[energy_type],
+                                                             sites=sites.get(energy_type))
+        if client is None:
+            client = handler_factory(energy_types[0]).client
+
+        # Même résolution que les modèles : relatif à backend/app
+        state_path = Path(state_path) if state_path else ModelTrain.model_path("", save_dir).parent / "scheduler_state.json"
+        graph = JobGraph(state_path, max_workers=workers)
+        build_graph(graph, energy_types, handler_factory, database_factory, client, save_dir,
+                    api_url, min_r2, n_iter_search, retries, backoff, start_date, end_date, overlap_days)
+
+        stop = Event()
+        signal.signal(signal.SIGTERM, lambda *_: stop.set())
+        try:
+            while not stop.is_set():
+                logger.info("--- Nouvelle exécution pour : %s ---", ", ".join(energy_types))
+                graph.run()
+                if once:
+                    break
+                logger.info("Prochaine exécution dans %.0fs", interval)
+                stop.wait(interval)
+        except KeyboardInterrupt:
+            pass
+        logger.info("Arrêt du planificateur")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Planificateur d'ingestion et de réentraînement des modèles d'énergie.")
+    parser.add_argument("energy_types", nargs="*", default=list(ENERGY_CONFIG),
+                        help=f"Types d'énergie à traiter parmi {list(ENERGY_CONFIG)} (tous par défaut)")
+    parser.add_argument("--interval", type=float, default=86400, help="Secondes entre deux exécutions")
+    parser.add_argument("--once", action="store_true", help="Une seule exécution puis arrêt")
+    parser.add_argument("--mock", action="store_true", help="APIs et base simulées (aucune connexion)")
+    parser.add_argument("--save-dir", type=str, default=None, help="Dossier des modèles servis (saved_models par défaut)")
+    parser.add_argument("--state", type=str, default=None, help="Fichier d'état (empreintes des étapes)")
+    parser.add_argument("--sites", type=str, default=None,
+                        help='Fichier JSON des sites : liste pour un seul type, ou {"solaire": [...], "hydro": [...]}')
+    parser.add_argument("--start", type=str, default=None,
+                        help="Début de la période chargée (YYYY-MM-DD), par défaut la dernière date en base moins --overlap jours")
+    parser.add_argument("--end", type=str, default=None, help="Fin de la période chargée (YYYY-MM-DD), aujourd'hui par défaut")
+    parser.add_argument("--overlap", type=int, default=OVERLAP_DAYS, help="Jours rechargés avant la dernière date en base")
+    parser.add_argument("--api-url", type=str, default=None, help="URL de l'API à notifier après remplacement d'un modèle")
+    parser.add_argument("--min-r2", type=float, default=None, help="R² test minimal pour mettre un modèle en service")
+    parser.add_argument("--n-iter", type=int, default=20, help="n_iter_search de l'optimisation")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--retries", type=int, default=3)
+    parser.add_argument("--backoff", type=float, default=2.0, help="Délai initial entre deux tentatives (doublé à chaque essai)")
+    args = parser.parse_args()
+    unknown = set(args.energy_types) - set(ENERGY_CONFIG)
+    if unknown:
+        parser.error(f"Types d'énergie inconnus : {sorted(unknown)}")
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    main(args.energy_types, args.interval, args.once, args.mock, args.save_dir, args.state, args.sites,
+         args.api_url, args.min_r2, args.n_iter, args.workers, args.retries, args.backoff,
+         args.start, args.end, args.overlap)
@@ -7,74 +7,108 @@ from model_trainer import ModelTrain
 import argparse
 
 
-def main(energy_type: str):
-    """
-    Script d'entraînement pour différents types d'énergie :
-    - hydro
-    - eolienne
-    - solaire
-    """
+# Dictionnaire de configuration
+ENERGY_CONFIG = {
+    "hydro": {
+        "table": "hydro_data",
+        "features": ["QmnJ", "HIXnJ"],
+        "target": "prod_hydro",
+    },
+    "eolienne": {
+        "table": "eolienne_data",
+        "features": [
+            "wind_speed_10m_mean",
+            "pressure_msl_mean",
+            "temperature_2m_mean",
+            "wind_speed3",
+            "temp_press"
+        ],
+        "target": "prod_eolienne",
+    },
+    "solaire": {
+        "table": "solaire_data",
+        "features": ["global_tilted_irradiance", "temperature_2m"],
+        "target": "prod_solaire",
+    },
+}
+
+
+# Nombre maximal de lignes renvoyées par une requête Supabase (PostgREST)
+PAGE_SIZE = 1000
+
+
+def add_features(df: pd.DataFrame, energy_type: str) -> pd.DataFrame:
+    # === Création des features spécifiques pour l’éolien ===
+    if energy_type == "eolienne":
+        df["wind_speed3"] = df["wind_speed_10m_mean"] ** 3
+        df["temp_press"] = df["temperature_2m_mean"] * df["pressure_msl_mean"]
 
-    print(f"--- Démarrage de l'entraînement du modèle pour : {energy_type.upper()} ---")
+        print("Features supplémentaires créées : wind_speed3 et temp_press")
+    return df
 
-    # Chargement des variables d'environnement
-    load_dotenv()
-    SUPABASE_URL = os.getenv("SUPABASE_URL")
-    SUPABASE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
-
-    if not SUPABASE_URL or not SUPABASE_KEY:
-        raise ValueError("Variables d'environnement manquantes : SUPABASE_URL ou SUPABASE_SERVICE_ROLE_KEY")
-
-    # Connexion à Supabase
-    supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
-
-    # Dictionnaire de configuration
-    ENERGY_CONFIG = {
-        "hydro": {
-            "table": "hydro_data",
-            "features": ["QmnJ", "HIXnJ"],
-            "target": "prod_hydro",
-        },
-        "eolienne": {
-            "table": "eolienne_data",
-            "features": [
-                "wind_speed_10m_mean",
-                "pressure_msl_mean",
-                "temperature_2m_mean",
-                "wind_speed3",
-                "temp_press"
-            ],
-            "target": "prod_eolienne",
-        },
-        "solaire": {
-            "table": "solaire_data",
-            "features": ["global_tilted_irradiance", "temperature_2m"],
-            "target": "prod_solaire",
-        },
-    }
 
+def load_data(energy_type: str, supabase=None, site: str = None) -> pd.DataFrame:
+    """
+    Charge la table d'entraînement depuis Supabase (tous les sites, ou `site`),
+    triée par date, avec les features dérivées
+    """
     if energy_type not in ENERGY_CONFIG:
         raise ValueError(f"Type d'énergie non reconnu : {energy_type}. Choisir parmi {list(ENERGY_CONFIG.keys())}")
 
+    if supabase is None:
+        # Chargement des variables d'environnement
+        load_dotenv()
+        SUPABASE_URL = os.getenv("SUPABASE_URL")
+        SUPABASE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+
+        if not SUPABASE_URL or not SUPABASE_KEY:
+            raise ValueError("Variables d'environnement manquantes : SUPABASE_URL ou SUPABASE_SERVICE_ROLE_KEY")
+
+        # Connexion à Supabase
+        supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
     config = ENERGY_CONFIG[energy_type]
 
     # Chargement des données depuis Supabase
     print(f"Chargement des données depuis la table {config['table']} ...")
-    data = supabase.table(config["table"]).select("*").order("date", desc=False).limit(4000).execute()
-    df = pd.DataFrame(data.data)
+    # Lecture par pages, dans un ordre stable (site, date) : chaque site garde tout son historique
+    rows = []
+    while True:
+        query = supabase.table(config["table"]).select("*")
+        if site is not None:
+            query = query.eq("site", site)
+        page = query.order("site").order("date").range(len(rows), len(rows) + PAGE_SIZE - 1).execute().data
+        rows.extend(page)
+        if len(page) < PAGE_SIZE:
+            break
+    df = pd.DataFrame(rows)
 
     if df.empty:
-        print("Aucune donnée trouvée pour ce type d'énergie. Entraînement annulé.")
-        return
+        return df
+
+    # Le découpage train/test de ModelTrain est chronologique : les sites sont entremêlés par date
+    df = df.sort_values(["date", "site"], kind="stable").reset_index(drop=True)
 
     print(f"{len(df)} lignes chargées depuis Supabase.")
+    return add_features(df, energy_type)
 
-    # === Création des features spécifiques pour l’éolien ===
-    if energy_type == "eolienne":
-        df["wind_speed3"] = df["wind_speed_10m_mean"] ** 3
-        df["temp_press"] = df["temperature_2m_mean"] * df["pressure_msl_mean"]
 
-        print("Features supplémentaires créées : wind_speed3 et temp_press")
+def main(energy_type: str):
+    """
+    Script d'entraînement pour différents types d'énergie :
+    - hydro
+    - eolienne
+    - solaire
+    """
+
+    print(f"--- Démarrage de l'entraînement du modèle pour : {energy_type.upper()} ---")
+
+    df = load_data(energy_type)
+
+    if df.empty:
+        print("Aucune donnée trouvée pour ce type d'énergie. Entraînement annulé.")
+        return
+
+    config = ENERGY_CONFIG[energy_type]
 
     # Entraînement du modèle
     print(f"Entraînement du modèle pour {energy_type.upper()}...")
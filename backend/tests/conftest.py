@@ -0,0 +1,17 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[2]
+# Scripts de backend/app (imports `from model_trainer import ...`), API (`app.`), handlers/ et benchmarks/
+for path in (ROOT / "backend" / "app", ROOT / "backend", ROOT):
+    sys.path.insert(0, str(path))
+os.environ.setdefault("types", "solaire,eolienne,hydro")
+
+
+@pytest.fixture
+def hydro_table():
+    from benchmarks.synthetic import make_table
+    return make_table("hydro", 400, "daily", seed=0)
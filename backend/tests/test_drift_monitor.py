@@ -0,0 +1,59 @@
+import shutil
+
+import pytest
+
+from app.drift_monitor import MIN_SAMPLES, DriftMonitor
+from app.model_trainer import ModelTrain
+
+FEATURES = ["QmnJ", "HIXnJ"]
+
+
+@pytest.fixture
+def monitored(tmp_path, hydro_table):
+    trainer = ModelTrain("hydro", FEATURES, "prod_hydro", save_dir=str(tmp_path))
+    trainer.fit(hydro_table, {"n_estimators": 5, "max_depth": 3}, n_jobs=1)
+    trainer.save(hydro_table)
+    return DriftMonitor("hydro", str(tmp_path)), trainer
+
+
+def serve(monitor, trainer, data):
+    monitor.update(data[FEATURES].to_dict(orient="records"), trainer.predict(data))
+
+
+def test_training_distribution_is_stable(monitored, hydro_table):
+    monitor, trainer = monitored
+    serve(monitor, trainer, hydro_table)
+
+    scores = monitor.scores()
+    assert scores["samples"] == len(hydro_table) >= MIN_SAMPLES
+    assert scores["status"] == "stable"
+    assert set(scores["columns"]) == {*FEATURES, "prediction"}
+
+
+def test_shifted_inputs_are_reported(monitored, hydro_table):
+    monitor, trainer = monitored
+    shifted = hydro_table.assign(QmnJ=hydro_table["QmnJ"] * 3)
+    serve(monitor, trainer, shifted)
+
+    scores = monitor.scores()
+    assert scores["status"] == "drift"
+    assert scores["retrain_recommended"]
+    assert scores["columns"]["QmnJ"]["out_of_range_rate"] > 0
+
+
+def test_reference_survives_copy_but_not_new_model(monitored, hydro_table, tmp_path):
+    monitor, trainer = monitored
+    path = ModelTrain.model_path("hydro", str(tmp_path))
+    # Copie sans conserver la date de modification (checkout, déploiement) : même contenu, même référence
+    shutil.copy(path, tmp_path / "copy.pkl")
+    shutil.copy(tmp_path / "copy.pkl", path)
+    assert monitor.scores()["status"] != "no_reference"
+
+    # Nouveau modèle à côté de l'ancien résumé (copie partielle) : la référence n'est plus valable
+    summary_path = ModelTrain.summary_path("hydro", str(tmp_path))
+    old_summary = summary_path.read_text()
+    other = ModelTrain("hydro", FEATURES, "prod_hydro", save_dir=str(tmp_path))
+    other.fit(hydro_table.head(100), {"n_estimators": 3}, n_jobs=1)
+    other.save(hydro_table.head(100))
+    summary_path.write_text(old_summary)
+    assert monitor.scores()["status"] == "no_reference"
@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+
+from app.history import downsample, lttb, lttb_buckets
+
+
+def history_frame(n=1000):
+    df = pd.DataFrame({"date": pd.date_range("2020-01-01", periods=n, freq="D", tz="UTC"),
+                       "mean": np.sin(np.arange(n) / 20)})
+    df["min"] = df["mean"] - 1
+    df["max"] = df["mean"] + 1
+    df["count"] = 24
+    return df
+
+
+def test_lttb_keeps_endpoints_and_one_point_per_bucket():
+    x = np.arange(1000, dtype=float)
+    indices = lttb(x, np.sin(x / 20), 50)
+    bounds = np.append(lttb_buckets(1000, 50), 1000)
+
+    assert len(indices) == 50
+    assert indices[0] == 0 and indices[-1] == 999
+    assert all(bounds[i] <= index < bounds[i + 1] for i, index in enumerate(indices))
+
+
+def test_downsample_reduces_min_max_count_over_buckets():
+    df = history_frame()
+    df.loc[501, "max"] = 99.0
+    df.loc[733, "min"] = -99.0
+
+    out = downsample(df, 50)
+
+    assert len(out) == 50
+    assert out["max"].max() == 99.0
+    assert out["min"].min() == -99.0
+    assert out["count"].sum() == df["count"].sum()
+
+
+def test_short_history_is_unchanged():
+    df = history_frame(20)
+    assert downsample(df, 50) is df
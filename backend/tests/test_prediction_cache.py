@@ -0,0 +1,73 @@
+import pandas as pd
+import pytest
+
+from app.model_trainer import ModelTrain
+from app.prediction_cache import PredictionCache
+
+FEATURES = ["QmnJ", "HIXnJ"]
+TARGET = "prod_hydro"
+
+
+@pytest.fixture
+def save_model(tmp_path, monkeypatch):
+    """Redirige les modèles sauvegardés vers un dossier temporaire et retourne une fonction d'entraînement"""
+    monkeypatch.setattr(ModelTrain, "model_path",
+                        staticmethod(lambda producer_type, save_dir="saved_models": tmp_path / f"{producer_type}.pkl"))
+    monkeypatch.setattr(ModelTrain, "summary_path",
+                        staticmethod(lambda producer_type, save_dir="saved_models": tmp_path / f"{producer_type}.json"))
+
+    def save(data, n_estimators):
+        trainer = ModelTrain("hydro", FEATURES, TARGET, save_dir=str(tmp_path))
+        trainer.fit(data, {"n_estimators": n_estimators, "max_depth": 3}, n_jobs=1)
+        trainer.save(data)
+        return trainer
+    return save
+
+
+def test_hits_after_first_prediction(save_model, hydro_table):
+    save_model(hydro_table, 5)
+    cache = PredictionCache(maxsize=10)
+    inputs = {"QmnJ": 25.0, "HIXnJ": 480.0}
+
+    first = cache.predict("hydro", FEATURES, TARGET, inputs)
+    second = cache.predict("hydro", FEATURES, TARGET, inputs)
+
+    assert first == second
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_new_model_version_invalidates_predictions(save_model, hydro_table):
+    save_model(hydro_table, 5)
+    cache = PredictionCache(maxsize=10)
+    inputs = {"QmnJ": 25.0, "HIXnJ": 480.0}
+    cache.predict("hydro", FEATURES, TARGET, inputs)
+    old_version = ModelTrain.version("hydro")
+
+    trainer = save_model(hydro_table.sample(frac=1, random_state=1).head(200), 7)
+    prediction = cache.predict("hydro", FEATURES, TARGET, inputs)
+
+    assert ModelTrain.version("hydro") != old_version
+    assert prediction == pytest.approx(float(trainer.predict(pd.DataFrame([inputs]))[0]))
+    assert cache.misses == 2
+    assert cache.invalidations == 1
+    assert cache.stats()["model_versions"] == {"hydro": ModelTrain.version("hydro")}
+
+
+def test_invalidate_and_lru_eviction(save_model, hydro_table):
+    save_model(hydro_table, 5)
+    cache = PredictionCache(maxsize=2)
+    rows = [{"QmnJ": float(q), "HIXnJ": 480.0} for q in (10, 20, 30)]
+
+    cache.predict_many("hydro", FEATURES, TARGET, rows)
+    assert cache.stats()["size"] == 2
+    assert cache.evictions == 1
+
+    cache.invalidate("hydro")
+    assert cache.stats()["size"] == 0
+    cache.predict("hydro", FEATURES, TARGET, rows[-1])
+    assert cache.hits == 0
+
+
+def test_missing_model_raises(save_model):
+    with pytest.raises(FileNotFoundError):
+        PredictionCache().predict("hydro", FEATURES, TARGET, {"QmnJ": 1.0, "HIXnJ": 1.0})
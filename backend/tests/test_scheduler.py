@@ -0,0 +1,137 @@
+from contextlib import ExitStack
+
+import pytest
+
+import scheduler
+from scheduler import JobGraph, build_graph
+
+
+class Counter:
+    """Étape de test : compte ses appels et retourne `value` (ou la valeur calculée)"""
+
+    def __init__(self, value=None, fail=0):
+        self.value = value
+        self.fail = fail
+        self.calls = 0
+
+    def __call__(self, *inputs):
+        self.calls += 1
+        if self.calls <= self.fail:
+            raise RuntimeError(f"échec {self.calls}")
+        return self.value
+
+
+def chain(state_path, source, middle, last, verify=None, **options):
+    graph = JobGraph(state_path, max_workers=2)
+    graph.add("source", source, **options)
+    graph.add("middle", middle, ["source"], **options)
+    graph.add("last", last, ["middle"], verify=verify, **options)
+    return graph
+
+
+@pytest.fixture(autouse=True)
+def no_sleep(monkeypatch):
+    delays = []
+    monkeypatch.setattr(scheduler.time, "sleep", delays.append)
+    return delays
+
+
+def test_unknown_dependency_is_rejected(tmp_path):
+    graph = JobGraph(tmp_path / "state.json")
+    with pytest.raises(ValueError):
+        graph.add("clean", Counter(), ["fetch"])
+
+
+def test_unchanged_inputs_skip_the_rest_of_the_branch(tmp_path):
+    source, middle, last = Counter({"rows": 3}), Counter([1, 2, 3]), Counter({"version": "a"})
+    state_path = tmp_path / "state.json"
+
+    first = chain(state_path, source, middle, last).run()
+    second = chain(state_path, source, middle, last).run()
+
+    assert set(first.values()) == {"done"}
+    assert second == {"source": "done", "middle": "skipped", "last": "skipped"}
+    assert (source.calls, middle.calls, last.calls) == (2, 1, 1)
+
+
+def test_changed_input_with_same_output_skips_downstream(tmp_path):
+    state_path = tmp_path / "state.json"
+    middle, last = Counter([1, 2, 3]), Counter({"version": "a"})
+
+    chain(state_path, Counter("lundi"), middle, last).run()
+    statuses = chain(state_path, Counter("mardi"), middle, last).run()
+
+    # Nouvelle source, mais l'étape intermédiaire produit la même chose : l'étape coûteuse est sautée
+    assert statuses == {"source": "done", "middle": "done", "last": "skipped"}
+    assert (middle.calls, last.calls) == (2, 1)
+
+
+def test_changed_output_reruns_descendants(tmp_path):
+    state_path = tmp_path / "state.json"
+    last = Counter({"version": "a"})
+
+    chain(state_path, Counter(1), Counter("x"), last).run()
+    statuses = chain(state_path, Counter(2), Counter("y"), last).run()
+
+    assert statuses == {"source": "done", "middle": "done", "last": "done"}
+    assert last.calls == 2
+
+
+def test_missing_outputs_reset_the_branch(tmp_path):
+    state_path = tmp_path / "state.json"
+    middle, last = Counter([1]), Counter({"version": "a"})
+    exists = {"value": True}
+    verify = lambda result: exists["value"] and result == {"version": "a"}
+
+    chain(state_path, Counter(1), middle, last, verify).run()
+    assert chain(state_path, Counter(1), middle, last, verify).run()["last"] == "skipped"
+
+    exists["value"] = False
+    statuses = chain(state_path, Counter(1), middle, last, verify).run()
+
+    assert statuses == {"source": "done", "middle": "done", "last": "done"}
+    assert (middle.calls, last.calls) == (2, 2)
+
+
+def test_retries_with_exponential_backoff(tmp_path, no_sleep):
+    middle = Counter([1], fail=2)
+
+    statuses = chain(tmp_path / "state.json", Counter(1), middle, Counter(), retries=3, backoff=0.5).run()
+
+    assert statuses["middle"] == "done"
+    assert middle.calls == 3
+    assert no_sleep == [0.5, 1.0]
+
+
+def test_failure_marks_descendants_and_is_retried_next_run(tmp_path):
+    state_path = tmp_path / "state.json"
+    last = Counter()
+
+    statuses = chain(state_path, Counter(1), Counter(fail=10), last, retries=1, backoff=0).run()
+    assert statuses == {"source": "done", "middle": "failed", "last": "upstream_failed"}
+    assert last.calls == 0
+
+    statuses = chain(state_path, Counter(1), Counter([1]), last, retries=1, backoff=0).run()
+    assert statuses == {"source": "done", "middle": "done", "last": "done"}
+
+
+def test_retrain_skipped_when_training_table_unchanged(tmp_path):
+    """Un nouveau jour de météo sans production ne relance pas l'entraînement"""
+    from benchmarks.mock_scheduler import mock_upstreams
+    from handlers.datahandler import APIDataHandler
+
+    save_dir = str(tmp_path / "models")
+    state_path = tmp_path / "state.json"
+    statuses = []
+    with ExitStack() as stack:
+        client, database_factory = mock_upstreams(stack, ["hydro"])
+        for end_date in ("2025-10-10", "2025-10-10", "2025-10-11"):
+            graph = JobGraph(state_path)
+            build_graph(graph, ["hydro"], lambda energy_type: APIDataHandler("http://mock", "mock", energy_type, "http://mock"),
+                        database_factory, client, save_dir, n_iter_search=1, retries=0, end_date=end_date)
+            statuses.append(graph.run())
+
+    assert statuses[0]["hydro.hot_swap"] == "done"
+    assert statuses[1]["hydro.clean"] == "skipped"
+    assert statuses[2]["hydro.clean"] == "done"
+    assert statuses[2]["hydro.retrain"] == "skipped"
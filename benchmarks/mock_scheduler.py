@@ -0,0 +1,37 @@
+"""
+Branchement des doublures (Supabase, Open-Meteo, Hub'eau) pour `scheduler.py --mock` :
+le planificateur tourne de bout en bout sans connexion, sur les données synthétiques.
+"""
+from contextlib import ExitStack
+from typing import List
+from unittest import mock
+import os
+
+from benchmarks.synthetic import (
+    TABLES,
+    FakeDatabase,
+    FakeOpenMeteoClient,
+    FakeSupabaseClient,
+    fake_hubeau_get,
+    make_table,
+)
+from handlers.sites import DEFAULT_SITE
+
+
+def mock_upstreams(stack: ExitStack, energy_types: List[str], seed: int = 0):
+    """Active les doublures jusqu'à la fermeture de `stack`, retourne (client, fabrique de Database)"""
+    os.environ.setdefault("types", ",".join(TABLES))
+    client = FakeSupabaseClient()
+    # Production historique déjà ingérée (export CSV) pour le site par défaut
+    for energy_type in energy_types:
+        table = make_table(energy_type, 3316, "daily", seed)
+        table.insert(0, "site", DEFAULT_SITE[energy_type])
+        client.table(TABLES[energy_type]["table"]).upsert(table.to_dict(orient="records"),
+                                                          on_conflict="site,date").execute()
+
+    stack.enter_context(mock.patch("handlers.datahandler.create_client", return_value=client))
+    stack.enter_context(mock.patch("handlers.datahandler.openmeteo_requests.Client",
+                                   lambda session=None: FakeOpenMeteoClient(session, seed=seed)))
+    stack.enter_context(mock.patch("handlers.datahandler.requests.get",
+                                   lambda url, params=None, **kw: fake_hubeau_get(url, params, seed=seed)))
+    return client, lambda energy_type: FakeDatabase(client, energy_type)
@@ -0,0 +1,414 @@
+"""
+Benchmarks reproductibles du pipeline : nettoyage, ingestion, entraînement et prédiction.
+
+Les services externes (Open-Meteo, Hub'eau, Supabase) sont remplacés par les doublures
+de `benchmarks.synthetic`, les résultats sont écrits en JSON pour comparer les exécutions.
+
+Usage (depuis la racine du dépôt) :
+    python -m benchmarks.run
+    python -m benchmarks.run --quick --compare benchmarks/results/<précédent>.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+from datetime import datetime, timezone
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+# handlers/ s'importe depuis la racine, l'API depuis backend/ (comme `fastapi dev main.py`)
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "backend"))
+os.environ.setdefault("types", "solaire,eolienne,hydro")
+
+from benchmarks.synthetic import (
+    TABLES,
+    UPSTREAM_REQUESTS,
+    FakeOpenMeteoClient,
+    FakeSupabaseClient,
+    fake_hubeau_get,
+    make_production_csv,
+    make_sites,
+    make_table,
+)
+
+ENERGY_TYPES = ("solaire", "eolienne", "hydro")
+RESULTS_DIR = ROOT / "benchmarks" / "results"
+# Période fixe pour les handlers API : charge identique d'un jour à l'autre
+BENCH_WINDOW = {"end_date": "2025-09-29"}
+
+
+def measure(fn, repeat: int = 5, warmup: int = 1) -> dict:
+    """Chronomètre `fn` (perf_counter) et retourne les statistiques en secondes"""
+    for _ in range(warmup):
+        fn()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    timings = np.asarray(timings)
+    return {
+        "repeat": repeat,
+        "min_s": float(timings.min()),
+        "median_s": float(np.median(timings)),
+        "mean_s": float(timings.mean()),
+        "p95_s": float(np.percentile(timings, 95)),
+        "max_s": float(timings.max()),
+    }
+
+
+@contextlib.contextmanager
+def mocked_upstreams(seed: int = 0):
+    """Remplace Supabase, Open-Meteo et Hub'eau le temps du bloc"""
+    client = FakeSupabaseClient()
+    with mock.patch("handlers.datahandler.create_client", return_value=client), \
+         mock.patch("handlers.datahandler.openmeteo_requests.Client",
+                    lambda session=None: FakeOpenMeteoClient(session, seed=seed)), \
+         mock.patch("handlers.datahandler.requests.get",
+                    lambda url, params=None, **kw: fake_hubeau_get(url, params, seed=seed)):
+        yield client
+
+
+def bench_clean(args) -> list:
+    from handlers.datahandler import CSVDataHandler, APIDataHandler
+
+    results = []
+    with mocked_upstreams(args.seed), tempfile.TemporaryDirectory() as tmp:
+        for energy_type in ENERGY_TYPES:
+            for resolution, periods in (("daily", args.daily_rows), ("hourly", args.hourly_rows)):
+                raw = make_production_csv(energy_type, periods, resolution, args.seed)
+                handler = CSVDataHandler("http://bench", "key", energy_type, path="")
+                results.append({
+                    "name": f"clean.csv.{energy_type}.{resolution}",
+                    "params": {"rows": len(raw)},
+                    "stats": measure(lambda: handler.clean(raw), args.repeat),
+                })
+
+            handler = APIDataHandler("http://bench", "key", energy_type, api_url="http://bench", **BENCH_WINDOW)
+            raw = handler.load()
+            results.append({
+                "name": f"clean.api.{energy_type}",
+                "params": {"rows": len(raw)},
+                "stats": measure(lambda: handler.clean(raw.copy()), args.repeat),
+            })
+
+            path = Path(tmp) / f"{energy_type}.csv"
+            make_production_csv(energy_type, args.daily_rows, "daily", args.seed).to_csv(path, index=False)
+            handler = CSVDataHandler("http://bench", "key", energy_type, path=str(path))
+            results.append({
+                "name": f"save_to_db.csv.{energy_type}",
+                "params": {"rows": args.daily_rows},
+                "stats": measure(lambda: handler.save_to_db(TABLES[energy_type]["table"]), args.repeat),
+            })
+
+            handler = APIDataHandler("http://bench", "key", energy_type, api_url="http://bench", **BENCH_WINDOW)
+            results.append({
+                "name": f"save_to_db.api.{energy_type}",
+                "params": {},
+                "stats": measure(lambda: handler.save_to_db(TABLES[energy_type]["table"]), args.repeat),
+            })
+    return results
+
+
+def bench_train(args) -> list:
+    from app.model_trainer import ModelTrain
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for energy_type in ENERGY_TYPES:
+            config = TABLES[energy_type]
+            df = make_table(energy_type, args.daily_rows, "daily", args.seed)
+            features = list(config["features"])
+            if energy_type == "eolienne":
+                df["wind_speed3"] = df["wind_speed_10m_mean"] ** 3
+                df["temp_press"] = df["temperature_2m_mean"] * df["pressure_msl_mean"]
+                features += ["wind_speed3", "temp_press"]
+
+            trainer = ModelTrain(energy_type, features, config["target"], save_dir=tmp)
+            metrics = {}
+
+            def run():
+                # ModelTrain.train est verbeux : on garde la sortie du benchmark lisible
+                with contextlib.redirect_stdout(io.StringIO()):
+                    metrics.update(trainer.train(df, n_splits=args.n_splits, n_iter_search=args.n_iter))
+
+            results.append({
+                "name": f"train.search.{energy_type}",
+                "params": {"rows": len(df), "n_iter_search": args.n_iter, "n_splits": args.n_splits},
+                "stats": measure(run, args.train_repeat, warmup=0),
+                "metrics": {"R2_test": float(metrics["R2_test"]), "RMSE": float(metrics["RMSE"])},
+            })
+    return results
+
+
+def bench_predict(args) -> list:
+    from fastapi.testclient import TestClient
+    from app.main import app
+    from app.prediction_cache import prediction_cache
+
+    results = []
+    client = TestClient(app)
+    for energy_type in ENERGY_TYPES:
+        config = TABLES[energy_type]
+        rows = make_table(energy_type, args.batch_size, "daily", args.seed)[config["features"]]
+        payloads = rows.to_dict(orient="records")
+        url = f"/predict/{energy_type}"
+
+        def single_cold():
+            # Cache vidé : rechargement du modèle + prédiction, comme sans cache
+            prediction_cache.invalidate()
+            client.post(url, json=payloads[0]).raise_for_status()
+
+        def single_cached():
+            client.post(url, json=payloads[0]).raise_for_status()
+
+        def burst():
+            prediction_cache.invalidate()
+            for payload in payloads:
+                client.post(url, json=payload).raise_for_status()
+
+        def batch():
+            prediction_cache.invalidate()
+            client.post(f"{url}/batch", json={"inputs": payloads}).raise_for_status()
+
+        client.post(url, json=payloads[0]).raise_for_status()
+        model = prediction_cache._models[energy_type][1]
+
+        def cache_hit():
+            prediction_cache.predict(energy_type, model.features, model.target, payloads[0])
+
+        results.append({
+            "name": f"predict.single.{energy_type}",
+            "params": {"cache": "cold"},
+            "stats": measure(single_cold, args.repeat * 4),
+        })
+        results.append({
+            "name": f"predict.single_cached.{energy_type}",
+            "params": {"cache": "hot"},
+            "stats": measure(single_cached, args.repeat * 4),
+        })
+        results.append({
+            "name": f"predict.cache_hit.{energy_type}",
+            "params": {"cache": "hot", "http": False},
+            "stats": measure(cache_hit, args.repeat * 100),
+        })
+        results.append({
+            "name": f"predict.sequential.{energy_type}",
+            "params": {"batch_size": args.batch_size, "mode": "sequential_requests"},
+            "stats": measure(burst, args.repeat, warmup=0),
+        })
+        results.append({
+            "name": f"predict.batch.{energy_type}",
+            "params": {"batch_size": args.batch_size, "mode": "batch_route"},
+            "stats": measure(batch, args.repeat),
+        })
+    return results
+
+
+def bench_drift(args) -> list:
+    from app.model_trainer import ModelTrain
+    from app.drift_monitor import DriftMonitor
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for energy_type in ENERGY_TYPES:
+            config = TABLES[energy_type]
+            df = make_table(energy_type, args.daily_rows, "daily", args.seed)
+            trainer = ModelTrain(energy_type, config["features"], config["target"], save_dir=tmp)
+            trainer.fit(df, {"n_estimators": 20})
+            with contextlib.redirect_stdout(io.StringIO()):
+                trainer.save(df)
+
+            monitor = DriftMonitor(energy_type, save_dir=tmp)
+            rows = df[config["features"]].to_dict(orient="records")
+            predictions = df[config["target"]].tolist()
+            results.append({
+                "name": f"drift.update.{energy_type}",
+                "params": {"rows": len(rows)},
+                "stats": measure(lambda: monitor.update(rows, predictions), args.repeat),
+            })
+            results.append({
+                "name": f"drift.scores.{energy_type}",
+                "params": {},
+                "stats": measure(monitor.scores, args.repeat * 20),
+            })
+    return results
+
+
+def bench_fleet(args) -> list:
+    from handlers.datahandler import APIDataHandler
+
+    results = []
+    with mocked_upstreams(args.seed):
+        for energy_type in ENERGY_TYPES:
+            for count in (1, args.sites):
+                handler = APIDataHandler("http://bench", "key", energy_type, api_url="http://bench", **BENCH_WINDOW,
+                                         sites=make_sites(energy_type, count))
+                before = sum(UPSTREAM_REQUESTS.values())
+                stats = measure(lambda: handler.clean(handler.load()), args.repeat, warmup=0)
+                upstream = (sum(UPSTREAM_REQUESTS.values()) - before) // args.repeat
+                results.append({
+                    "name": f"fleet.refresh.{energy_type}.{count}sites",
+                    "params": {"sites": count, "upstream_requests": upstream},
+                    "stats": stats,
+                })
+    return results
+
+
+def bench_history(args) -> list:
+    from app import history
+
+    results = []
+    for energy_type in ENERGY_TYPES:
+        target = TABLES[energy_type]["target"]
+        table = make_table(energy_type, args.hourly_rows, "hourly", args.seed)
+        df = table.rename(columns={target: "mean"})[["date", "mean"]]
+        df["min"], df["max"], df["count"] = df["mean"], df["mean"], 1
+        for points in (500, 2000):
+            results.append({
+                "name": f"history.downsample.{energy_type}.{points}",
+                "params": {"rows": len(df), "points": points},
+                "stats": measure(lambda: history.downsample(df, points), args.repeat),
+            })
+        sampled = history.downsample(df, 2000)
+        results.append({
+            "name": f"history.serialize_json.{energy_type}",
+            "params": {"rows": len(sampled)},
+            "stats": measure(lambda: json.dumps(history.to_columns(sampled)), args.repeat),
+        })
+    return results
+
+
+def bench_backtest(args) -> list:
+    # backtesting.py est un script de backend/app (imports `from model_trainer import ...`)
+    sys.path.insert(0, str(ROOT / "backend" / "app"))
+    from backtesting import Backtester
+
+    results = []
+    config = TABLES["hydro"]
+    df = make_table("hydro", args.daily_rows, "daily", args.seed)
+    backtester = Backtester("hydro", config["features"], config["target"], params={"n_estimators": 50})
+    for workers in sorted({1, os.cpu_count() or 1}):
+        results.append({
+            "name": f"backtest.hydro.workers{workers}",
+            "params": {"rows": len(df), "train_windows": [0, 365], "cadences": [90], "workers": workers},
+            "stats": measure(lambda: backtester.run(df, [0, 365], [90], max_workers=workers),
+                             args.train_repeat, warmup=0),
+        })
+    return results
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def metadata(args) -> dict:
+    import pandas, sklearn, fastapi
+
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "versions": {
+            "numpy": np.__version__,
+            "pandas": pandas.__version__,
+            "scikit-learn": sklearn.__version__,
+            "fastapi": fastapi.__version__,
+        },
+        "args": vars(args),
+    }
+
+
+def compare(current: list, previous_path: Path):
+    previous = {r["name"]: r for r in json.loads(previous_path.read_text())["results"]}
+    print(f"\n--- Comparaison avec {previous_path} (médianes) ---")
+    for result in current:
+        before = previous.get(result["name"])
+        if before is None:
+            continue
+        ratio = result["stats"]["median_s"] / before["stats"]["median_s"]
+        print(f"{result['name']:<36} {before['stats']['median_s']:>10.4f}s -> "
+              f"{result['stats']['median_s']:>10.4f}s  x{ratio:.2f}")
+
+
+SUITES = {
+    "clean": bench_clean,
+    "train": bench_train,
+    "predict": bench_predict,
+    "drift": bench_drift,
+    "fleet": bench_fleet,
+    "history": bench_history,
+    "backtest": bench_backtest,
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks du pipeline de production EnR.")
+    parser.add_argument("suites", nargs="*", default=list(SUITES),
+                        help=f"Suites à lancer parmi {list(SUITES)} (toutes par défaut)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--train-repeat", type=int, default=1)
+    parser.add_argument("--daily-rows", type=int, default=3300, help="≈ 9 ans d'historique journalier")
+    parser.add_argument("--hourly-rows", type=int, default=79200, help="≈ 9 ans d'historique horaire")
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--sites", type=int, default=50, help="Taille du parc pour la suite fleet")
+    parser.add_argument("--n-iter", type=int, default=5, help="n_iter_search de RandomizedSearchCV")
+    parser.add_argument("--n-splits", type=int, default=3)
+    parser.add_argument("--quick", action="store_true", help="Tailles réduites pour un contrôle rapide")
+    parser.add_argument("--output", type=Path, default=None)
+    parser.add_argument("--compare", type=Path, default=None, help="Fichier JSON d'une exécution précédente")
+    args = parser.parse_args(argv)
+    unknown = set(args.suites) - set(SUITES)
+    if unknown:
+        parser.error(f"Suites inconnues : {sorted(unknown)}. Choisir parmi {list(SUITES)}")
+
+    if args.quick:
+        args.repeat, args.daily_rows, args.hourly_rows = 2, 800, 8000
+        args.batch_size, args.n_iter, args.n_splits, args.sites = 20, 2, 2, 10
+
+    try:
+        from sklearn.exceptions import InconsistentVersionWarning
+        warnings.simplefilter("ignore", InconsistentVersionWarning)
+    except ImportError:
+        pass
+
+    np.random.seed(args.seed)
+    results = []
+    for suite in args.suites:
+        print(f"Suite {suite} ...")
+        for result in SUITES[suite](args):
+            print(f"  {result['name']:<36} médiane {result['stats']['median_s'] * 1000:>10.2f} ms")
+            results.append(result)
+
+    report = {"meta": metadata(args), "results": results}
+    output = args.output
+    if output is None:
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        output = RESULTS_DIR / f"bench_{stamp}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2, default=str))
+    print(f"Résultats écrits dans {output}")
+
+    if args.compare is not None:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,340 @@
+"""
+Données synthétiques et doublures des services externes (Open-Meteo, Hub'eau, Supabase)
+utilisées par les benchmarks : aucun appel réseau, résultats reproductibles via la graine.
+"""
+from collections import Counter
+import numpy as np
+import pandas as pd
+
+# Nombre de requêtes reçues par chaque doublure d'API externe
+UPSTREAM_REQUESTS = Counter()
+
+FREQS = {"daily": "D", "hourly": "h"}
+
+TABLES = {
+    "solaire": {
+        "table": "solaire_data",
+        "target": "prod_solaire",
+        "features": ["global_tilted_irradiance", "temperature_2m"],
+    },
+    "eolienne": {
+        "table": "eolienne_data",
+        "target": "prod_eolienne",
+        "features": ["wind_speed_10m_mean", "pressure_msl_mean", "temperature_2m_mean"],
+    },
+    "hydro": {
+        "table": "hydro_data",
+        "target": "prod_hydro",
+        "features": ["QmnJ", "HIXnJ"],
+    },
+}
+
+
+def _weather(dates: pd.DatetimeIndex, rng: np.random.Generator) -> dict:
+    """Variables météo plausibles (saisonnalité annuelle + cycle journalier + bruit)"""
+    doy = dates.dayofyear.to_numpy()
+    hour = dates.hour.to_numpy()
+    season = np.sin(2 * np.pi * (doy - 80) / 365.25)
+    n = len(dates)
+    if (hour == 0).all():
+        # Résolution journalière : moyenne du cycle jour/nuit
+        daylight = np.full(n, 0.5)
+    else:
+        daylight = np.clip(np.sin(np.pi * (hour - 6) / 12), 0, None)
+
+    irradiance = np.clip(daylight * (600 + 300 * season) + rng.normal(0, 40, n), 0, None)
+    temperature = 15 + 10 * season + 4 * (daylight - 0.5) + rng.normal(0, 2, n)
+    wind = np.clip(rng.gamma(2.0, 2.5, n), 0.1, None)
+    pressure = 1015 + rng.normal(0, 6, n)
+    return {
+        "global_tilted_irradiance": irradiance,
+        "temperature_2m": temperature,
+        "temperature_2m_mean": temperature,
+        "wind_speed_10m_mean": wind,
+        "pressure_msl_mean": pressure,
+    }
+
+
+def _hydro(dates: pd.DatetimeIndex, rng: np.random.Generator) -> dict:
+    doy = dates.dayofyear.to_numpy()
+    n = len(dates)
+    flow = np.clip(25 + 15 * np.cos(2 * np.pi * doy / 365.25) + rng.gamma(2.0, 4.0, n), 1, None)
+    height = np.clip(300 + 8 * flow + rng.normal(0, 30, n), 1, None)
+    return {"QmnJ": flow, "HIXnJ": height}
+
+
+def make_dates(periods: int, resolution: str = "daily", start: str = "2016-09-01") -> pd.DatetimeIndex:
+    if resolution not in FREQS:
+        raise ValueError(f"resolution doit être parmi {list(FREQS)}, reçu: {resolution}")
+    return pd.date_range(start, periods=periods, freq=FREQS[resolution], tz="UTC")
+
+
+def make_table(energy_type: str, periods: int, resolution: str = "daily", seed: int = 0) -> pd.DataFrame:
+    """Table `{energy_type}_data` telle que stockée dans Supabase (date, production, features)"""
+    if energy_type not in TABLES:
+        raise ValueError(f"energy_type inconnu: {energy_type}")
+    rng = np.random.default_rng(seed)
+    dates = make_dates(periods, resolution)
+    config = TABLES[energy_type]
+
+    if energy_type == "hydro":
+        values = _hydro(dates, rng)
+        prod = 0.9 * values["QmnJ"] + 0.02 * values["HIXnJ"] + rng.normal(0, 3, periods)
+    else:
+        values = _weather(dates, rng)
+        if energy_type == "solaire":
+            prod = 0.08 * values["global_tilted_irradiance"] - 0.3 * values["temperature_2m"] + rng.normal(0, 2, periods)
+        else:
+            prod = 0.6 * values["wind_speed_10m_mean"] ** 3 / (1 + 0.02 * values["wind_speed_10m_mean"] ** 3) * 10
+            prod = prod + rng.normal(0, 2, periods)
+
+    df = pd.DataFrame({"date": dates.strftime("%Y-%m-%dT%H:%M:%SZ")})
+    df[config["target"]] = np.clip(prod, 0.1, 95)
+    for feature in config["features"]:
+        df[feature] = values[feature]
+    return df
+
+
+def make_production_csv(energy_type: str, periods: int, resolution: str = "daily", seed: int = 0) -> pd.DataFrame:
+    """Export brut de production comme lu par CSVDataHandler (valeurs manquantes, doublons, signes)"""
+    config = TABLES[energy_type]
+    rng = np.random.default_rng(seed + 1)
+    df = make_table(energy_type, periods, resolution, seed)[["date", config["target"]]]
+    date_col = "date_obs_elab" if energy_type == "hydro" else "date"
+    df = df.rename(columns={"date": date_col})
+
+    prod = df[config["target"]].to_numpy().copy()
+    prod[rng.random(periods) < 0.02] = np.nan
+    prod[rng.random(periods) < 0.02] *= -1
+    prod[rng.random(periods) < 0.01] = 10_000
+    df[config["target"]] = prod
+    duplicates = df.sample(frac=0.01, random_state=seed)
+    return pd.concat([df, duplicates], ignore_index=True)
+
+
+# --- Doublure Open-Meteo ---------------------------------------------------------------
+
+class _FakeVariable:
+    def __init__(self, values: np.ndarray):
+        self._values = values
+
+    def ValuesAsNumpy(self) -> np.ndarray:
+        return self._values
+
+
+class _FakeBlock:
+    def __init__(self, dates: pd.DatetimeIndex, interval: int, values: list):
+        self._start = int(dates[0].timestamp())
+        self._end = int(dates[-1].timestamp()) + interval
+        self._interval = interval
+        self._values = values
+
+    def Time(self) -> int:
+        return self._start
+
+    def TimeEnd(self) -> int:
+        return self._end
+
+    def Interval(self) -> int:
+        return self._interval
+
+    def Variables(self, index: int) -> _FakeVariable:
+        return _FakeVariable(self._values[index])
+
+
+class _FakeWeatherResponse:
+    def __init__(self, hourly: _FakeBlock = None, daily: _FakeBlock = None):
+        self._hourly = hourly
+        self._daily = daily
+
+    def Hourly(self) -> _FakeBlock:
+        return self._hourly
+
+    def Daily(self) -> _FakeBlock:
+        return self._daily
+
+
+class FakeOpenMeteoClient:
+    """Remplace `openmeteo_requests.Client` : même interface, valeurs générées localement"""
+
+    def __init__(self, session=None, seed: int = 0):
+        self.seed = seed
+        self.calls = 0
+
+    def weather_api(self, url: str, params: dict) -> list:
+        """Une réponse par couple (latitude, longitude), comme l'API pour plusieurs sites"""
+        self.calls += 1
+        UPSTREAM_REQUESTS["openmeteo"] += 1
+        latitudes = np.atleast_1d(params["latitude"])
+        longitudes = np.atleast_1d(params["longitude"])
+        start = pd.Timestamp(params["start_date"], tz="UTC")
+        end = pd.Timestamp(params["end_date"], tz="UTC") + pd.Timedelta(days=1)
+        block_name = "hourly" if "hourly" in params else "daily"
+        interval = 3600 if block_name == "hourly" else 86400
+        dates = pd.date_range(start, end, freq=pd.Timedelta(seconds=interval), inclusive="left")
+
+        responses = []
+        for latitude, longitude in zip(latitudes, longitudes):
+            rng = np.random.default_rng([self.seed, int(abs(latitude) * 1e4), int(abs(longitude) * 1e4)])
+            weather = _weather(dates, rng)
+            values = [weather[name].astype(np.float32) for name in params[block_name]]
+            responses.append(_FakeWeatherResponse(**{block_name: _FakeBlock(dates, interval, values)}))
+        return responses
+
+
+# --- Doublure Hub'eau ------------------------------------------------------------------
+
+class FakeHubeauResponse:
+    def __init__(self, payload: dict):
+        self._payload = payload
+        self.status_code = 200
+
+    def raise_for_status(self):
+        return None
+
+    def json(self) -> dict:
+        return self._payload
+
+
+# Période couverte par les stations fictives Hub'eau
+HUBEAU_SERIES_RANGE = ("2010-01-01", "2035-12-31")
+
+
+def fake_hubeau_get(url: str, params: dict = None, seed: int = 0, **kwargs) -> FakeHubeauResponse:
+    """Remplace `requests.get` pour l'API Hub'eau hydrométrie (observations élaborées, stations séparées par des virgules)"""
+    UPSTREAM_REQUESTS["hubeau"] += 1
+    # Série fixe par station, découpée selon la période : un même jour a la même valeur quelle que soit la requête
+    all_dates = pd.date_range(*HUBEAU_SERIES_RANGE, freq="D")
+    selected = (all_dates >= pd.Timestamp(params["date_debut_obs"])) & (all_dates <= pd.Timestamp(params["date_fin_obs"]))
+    dates = all_dates[selected]
+    grandeur = params["grandeur_hydro_elab"]
+    data = []
+    for code in params["code_entite"].split(","):
+        rng = np.random.default_rng([seed, sum(code.encode())])
+        values = _hydro(all_dates, rng)[grandeur][selected]
+        data.extend(
+            {
+                "code_station": code,
+                "date_obs_elab": day.strftime("%Y-%m-%d"),
+                "resultat_obs_elab": float(value),
+                "grandeur_hydro_elab": grandeur,
+            }
+            for day, value in zip(dates, values)
+        )
+    data = data[: params.get("size", len(data))]
+    return FakeHubeauResponse({"count": len(data), "data": data})
+
+
+def make_sites(energy_type: str, count: int) -> list:
+    """Parc fictif de `count` sites autour de Montpellier (ou stations Hub'eau pour l'hydro)"""
+    if energy_type == "hydro":
+        return [{"site": f"Y32100{i:04d}", "code_entite": f"Y32100{i:04d}"} for i in range(count)]
+    return [
+        {"site": f"parc_{i:03d}", "latitude": round(43.6109 + 0.05 * (i % 10), 4),
+         "longitude": round(3.8763 + 0.05 * (i // 10), 4)}
+        for i in range(count)
+    ]
+
+
+# --- Doublure Supabase -----------------------------------------------------------------
+
+class _FakeResult:
+    def __init__(self, data: list):
+        self.data = data
+
+
+class _FakeQuery:
+    def __init__(self, store: dict, name: str):
+        self._store = store
+        self._name = name
+        self._pending = None
+        self._order = []
+        self._filters = []
+        self._limit = None
+        self._range = None
+
+    def upsert(self, records: list, on_conflict: str = "id"):
+        keys = [key.strip() for key in on_conflict.split(",")]
+        self._pending = (records, keys)
+        return self
+
+    def select(self, columns: str = "*"):
+        return self
+
+    def eq(self, column: str, value):
+        self._filters.append((column, value))
+        return self
+
+    def order(self, column: str, desc: bool = False):
+        self._order.append((column, desc))
+        return self
+
+    def limit(self, size: int):
+        self._limit = size
+        return self
+
+    def range(self, start: int, end: int):
+        # Bornes incluses, comme PostgREST
+        self._range = (start, end + 1)
+        return self
+
+    def execute(self) -> _FakeResult:
+        table = self._store.setdefault(self._name, {})
+        if self._pending is not None:
+            records, keys = self._pending
+            for record in records:
+                # Comme PostgREST : seules les colonnes envoyées sont mises à jour
+                key = tuple(record[key] for key in keys)
+                table[key] = {**table.get(key, {}), **record}
+            return _FakeResult(records)
+        rows = [row for row in table.values() if all(row.get(column) == value for column, value in self._filters)]
+        for column, desc in reversed(self._order):
+            rows.sort(key=lambda row: row[column], reverse=desc)
+        if self._range is not None:
+            rows = rows[self._range[0]:self._range[1]]
+        return _FakeResult(rows[: self._limit] if self._limit else rows)
+
+
+class FakeSupabaseClient:
+    """Remplace le client Supabase : tables en mémoire, upsert sur la clé `on_conflict`"""
+
+    def __init__(self, *args, **kwargs):
+        self.store = {}
+
+    def table(self, name: str) -> _FakeQuery:
+        return _FakeQuery(self.store, name)
+
+
+class FakeDatabase:
+    """Remplace `Database` (`drop_na`, `site_stats`) sur les tables en mémoire d'un FakeSupabaseClient"""
+
+    REQUIRED = {
+        "solaire": ["prod_solaire", "date"],
+        "eolienne": ["prod_eolienne", "date"],
+        "hydro": ["prod_hydro", "date", "QmnJ", "HIXnJ"],
+    }
+
+    def __init__(self, client: FakeSupabaseClient, energy_type: str = None):
+        self.client = client
+        self.energy_type = energy_type
+
+    def site_stats(self) -> dict:
+        stats = {}
+        for row in self.client.store.get(f"{self.energy_type}_data", {}).values():
+            site = stats.setdefault(row["site"], {"rows": 0, "last_date": None, "prod_sum": 0.0})
+            site["rows"] += 1
+            site["last_date"] = max(site["last_date"] or row["date"], row["date"])
+            prod = row.get(f"prod_{self.energy_type}")
+            site["prod_sum"] += 0.0 if pd.isna(prod) else float(prod)
+        for site in stats.values():
+            site["last_date"] = pd.Timestamp(site["last_date"]).isoformat()
+            site["prod_sum"] = round(site["prod_sum"], 6)
+        return stats
+
+    def drop_na(self):
+        for energy_type, columns in self.REQUIRED.items():
+            if self.energy_type not in (None, energy_type):
+                continue
+            table = self.client.store.get(f"{energy_type}_data", {})
+            for key in [key for key, row in table.items() if any(pd.isna(row.get(col)) for col in columns)]:
+                del table[key]
@@ -0,0 +1,42 @@
+import streamlit as st
+import requests
+import pandas as pd
+
+API_URL = "http://localhost:8000"
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def fetch_history(energy_type: str, freq: str, points: int) -> pd.DataFrame:
+    """Historique agrégé et sous-échantillonné côté API, gardé en cache une heure"""
+    response = requests.get(
+        f"{API_URL}/history/{energy_type}",
+        params={"freq": freq, "points": points},
+        timeout=30,
+    )
+    response.raise_for_status()
+    data = response.json()
+    if "error" in data:
+        raise ValueError(data["error"])
+    df = pd.DataFrame({col: data[col] for col in ("date", "mean", "min", "max")})
+    df["date"] = pd.to_datetime(df["date"])
+    return df.set_index("date")
+
+
+def show_history(energy_type: str, label: str):
+    st.subheader(f"Historique de production {label}")
+    freqs = {"Jour": "daily", "Semaine": "weekly", "Mois": "monthly"}
+    freq = st.radio("Pas de temps", list(freqs), horizontal=True, key=f"freq_{energy_type}")
+
+    try:
+        df = fetch_history(energy_type, freqs[freq], 1000)
+    except requests.exceptions.ConnectionError:
+        st.error("Impossible de se connecter au serveur FastAPI. Vérifie s’il est bien lancé.")
+        return
+    except Exception as e:
+        st.error(f"Historique indisponible : {str(e)}")
+        return
+
+    if df.empty:
+        st.info("Aucune donnée historique.")
+        return
+    st.line_chart(df[["min", "mean", "max"]])
@@ -1,6 +1,7 @@
 import streamlit as st
 import requests
 import pandas as pd
+from history_chart import show_history
 
 st.set_page_config(page_title="Production Hydro", page_icon="⚡", layout="wide")
 st.title("Simulation Hydroélectrique")
@@ -33,3 +34,5 @@ if st.button("Prédire"):
     except Exception as e:
         st.error(f"Une erreur est survenue : {str(e)}")
 
+st.divider()
+show_history("hydro", "hydroélectrique")
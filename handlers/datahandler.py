@@ -1,14 +1,18 @@
 from supabase import create_client, Client
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 from retry_requests import retry
 from datetime import date
 import pandas as pd
+import json
 import requests
 import openmeteo_requests
 import requests_cache
 import os
 
+from handlers.sites import DEFAULT_SITES, DEFAULT_SITE
+
 # Exemple client Supabase à utiliser dans le client de la classe
 
 load_dotenv()
@@ -16,6 +20,33 @@ TYPES = os.getenv("types")
 CODE_ENTITY = os.getenv("code_entite")
 HYDRO_API_URL = os.getenv("hydro_api_url")
 
+# Début de l'historique chargé par défaut (la fin est la date du jour)
+DEFAULT_START_DATES = {"solaire": "2016-09-01", "eolienne": "2016-09-01", "hydro": "2022-09-01"}
+# Nombre de coordonnées envoyées dans une même requête Open-Meteo
+OPENMETEO_SITES_PER_REQUEST = 50
+# Taille maximale d'une page Hub'eau (observations élaborées)
+HUBEAU_MAX_ROWS = 20000
+# Historique minimal sur lequel le filtre IQR de l'hydro est calculé, quelle que soit la période demandée
+HUBEAU_IQR_LOOKBACK_DAYS = 3 * 365
+
+
+def load_sites(path: str, energy_type: str = None):
+    """
+    Lit les sites d'un parc (JSON) : liste [{"site", "latitude", "longitude"}] ou [{"site", "code_entite"}],
+    ou dictionnaire par type d'énergie {"solaire": [...], "hydro": [...]}.
+    Avec `energy_type`, retourne la liste de ce type (None s'il est absent du dictionnaire).
+    """
+    with open(path, encoding="utf-8") as f:
+        sites = json.load(f)
+    if energy_type is None or isinstance(sites, list):
+        return sites
+    return sites.get(energy_type)
+
+
+def chunks(items: list, size: int) -> list:
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
 # Classe abstraite
 class DataHandler(ABC):
     def __init__(self, url: str, service_key: str, energy_type: str = None):
@@ -23,6 +54,9 @@ class DataHandler(ABC):
             raise ValueError(f"energy_type doit être parmi {TYPES} ou None pour tous, reçu: {energy_type}")
       self.client = create_client(url, service_key)
       self.energy_type = energy_type
+
+    def default_site(self) -> str:
+      return DEFAULT_SITE.get(self.energy_type)
     
     @abstractmethod
     def load(self) -> pd.DataFrame:
@@ -35,17 +69,19 @@ class DataHandler(ABC):
       pass
     
     def save_to_db(self, table_name: str):
-      """Sauvegarde le DataFrame dans Supabase"""
+      """Sauvegarde le DataFrame dans Supabase (une ligne par couple site/date)"""
       df = self.load()
       df = self.clean(df)
       records = df.to_dict(orient="records")
-      response = (self.client.table(table_name).upsert(records, on_conflict="date").execute())
+      response = (self.client.table(table_name).upsert(records, on_conflict="site,date").execute())
       return response
 
 class CSVDataHandler(DataHandler):
-    def __init__(self, url, service_key, energy_type, path: str):
+    def __init__(self, url, service_key, energy_type, path: str, site: str = None):
        super().__init__(url, service_key, energy_type)
        self.path = path
+       # Site affecté aux lignes si l'export n'a pas de colonne "site"
+       self.site = site or self.default_site()
 
     def load(self) -> pd.DataFrame:
        return pd.read_csv(self.path)
@@ -63,6 +99,8 @@ class CSVDataHandler(DataHandler):
                 raise KeyError("La colonne 'date' est absente et l'index n'est pas temporel.")
 
         df["date"] = pd.to_datetime(df["date"], utc=True, errors="coerce")
+        if "site" not in df.columns:
+            df["site"] = self.site
 
         prod_col_map = {
             "hydro": "prod_hydro",
@@ -85,150 +123,176 @@ class CSVDataHandler(DataHandler):
             df[prod_col] = df[prod_col] * 1.5
 
         df = df.dropna(subset=["date", prod_col])
-        df = df.sort_values("date").drop_duplicates("date", keep="first").reset_index(drop=True)
+        df = df.sort_values(["site", "date"]).drop_duplicates(["site", "date"], keep="first").reset_index(drop=True)
         df["date"] = df["date"].dt.strftime("%Y-%m-%dT%H:%M:%SZ")
 
-        return df[["date", prod_col]]
+        return df[["site", "date", prod_col]]
 
 
 
 class APIDataHandler(DataHandler):
-    def __init__(self, url, service_key, energy_type, api_url :str):
+    def __init__(self, url, service_key, energy_type, api_url :str, sites: list = None, max_workers: int = 8,
+                 start_date: str = None, end_date: str = None):
         super().__init__(url, service_key, energy_type)
         self.api_url = api_url
+        self.sites = sites or DEFAULT_SITES[energy_type]
+        self.max_workers = max_workers
+        # Période chargée (YYYY-MM-DD), modifiable entre deux chargements
+        self.start_date = start_date
+        self.end_date = end_date
+
+    def window(self) -> tuple:
+        """Période effective : début par défaut du type d'énergie, fin à la date du jour"""
+        return (self.start_date or DEFAULT_START_DATES[self.energy_type],
+                self.end_date or date.today().isoformat())
+
+    def hydro_reference_start(self) -> str:
+        """
+        Début des observations Hub'eau chargées : au moins HUBEAU_IQR_LOOKBACK_DAYS avant la fin,
+        pour que les bornes IQR ne dépendent pas de la longueur de la période demandée.
+        """
+        start, end = self.window()
+        lookback = pd.Timestamp(end) - pd.Timedelta(days=HUBEAU_IQR_LOOKBACK_DAYS)
+        return min(pd.Timestamp(start), lookback).strftime("%Y-%m-%d")
+
+    def _fetch_weather(self, params: dict, block: str) -> pd.DataFrame:
+        """
+        Interroge Open-Meteo pour tous les sites : plusieurs coordonnées par requête
+        (une réponse par site, dans l'ordre), les requêtes étant lancées en parallèle.
+        """
+        variables = params[block]
+
+        def fetch(sites: list) -> list:
+            retry_session = retry(requests.Session(), retries=5, backoff_factor=0.2)
+            openmeteo = openmeteo_requests.Client(session=retry_session)
+            site_params = dict(params,
+                               latitude=[site["latitude"] for site in sites],
+                               longitude=[site["longitude"] for site in sites])
+            responses = openmeteo.weather_api(self.api_url, params=site_params)
+
+            frames = []
+            for site, response in zip(sites, responses):
+                data = response.Hourly() if block == "hourly" else response.Daily()
+                site_data = {"date": pd.date_range(
+                start = pd.to_datetime(data.Time(), unit = "s", utc = True),
+                end = pd.to_datetime(data.TimeEnd(), unit = "s", utc = True),
+                freq = pd.Timedelta(seconds = data.Interval()),
+                inclusive = "left"
+                )}
+                for i, variable in enumerate(variables):
+                    site_data[variable] = data.Variables(i).ValuesAsNumpy()
+                site_dataframe = pd.DataFrame(data = site_data)
+                site_dataframe.insert(0, "site", site["site"])
+                frames.append(site_dataframe)
+            return frames
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            results = executor.map(fetch, chunks(self.sites, OPENMETEO_SITES_PER_REQUEST))
+            return pd.concat([frame for frames in results for frame in frames], ignore_index=True)
 
     def load(self) -> pd.DataFrame:
+        start, end = self.window()
         
         if self.energy_type == "solaire":
             
-            retry_session = retry(requests.Session(), retries=5, backoff_factor=0.2)
-            openmeteo_solaire = openmeteo_requests.Client(session=retry_session)
             params_solaire = {
-              "latitude": 43.6109,
-              "longitude": 3.8763,
-              "start_date": "2016-09-01",
-              "end_date": "2025-09-29",
+              "start_date": start,
+              "end_date": end,
               "timezone": "UTC",
               "hourly": ["global_tilted_irradiance", "temperature_2m"],
               "tilt": 35,
             }
-            responses = openmeteo_solaire.weather_api(self.api_url, params=params_solaire)
-            hourly = responses[0].Hourly()
-            hourly_global_tilted_irradiance = hourly.Variables(0).ValuesAsNumpy()
-            hourly_temperature_2m = hourly.Variables(1).ValuesAsNumpy()
-
-            hourly_data = {"date": pd.date_range(
-            start = pd.to_datetime(hourly.Time(), unit = "s", utc = True),
-            end = pd.to_datetime(hourly.TimeEnd(), unit = "s", utc = True),
-            freq = pd.Timedelta(seconds = hourly.Interval()),
-            inclusive = "left"
-            )}
-            hourly_data["global_tilted_irradiance"] = hourly_global_tilted_irradiance
-            hourly_data["temperature_2m"] = hourly_temperature_2m
-            hourly_dataframe = pd.DataFrame(data = hourly_data)
-            daily_dataframe= hourly_dataframe.resample('D', on='date').mean()
+            hourly_dataframe = self._fetch_weather(params_solaire, "hourly")
+            daily_dataframe = (
+                hourly_dataframe.set_index("date")
+                .groupby("site")[params_solaire["hourly"]]
+                .resample("D").mean()
+                .reset_index()
+            )
             return daily_dataframe
 
         elif self.energy_type == "eolienne":
             
-            retry_session = retry(requests.Session(), retries=5, backoff_factor=0.2)
-            openmeteo_eolienne = openmeteo_requests.Client(session=retry_session)
             params_eolienne = {
-              "latitude": 43.6109,
-              "longitude": 3.8763,
-              "start_date": "2016-09-01",
-              "end_date": "2025-09-29",
+              "start_date": start,
+              "end_date": end,
               "timezone": "UTC",
               "daily": ["temperature_2m_mean", "wind_speed_10m_mean", "pressure_msl_mean"],
             }
-            responses = openmeteo_eolienne.weather_api(self.api_url, params=params_eolienne)
-            daily = responses[0].Daily()
-            daily_temperature_2m_mean = daily.Variables(0).ValuesAsNumpy()
-            daily_wind_speed_10m_mean = daily.Variables(1).ValuesAsNumpy()
-            daily_pressure_msl_mean = daily.Variables(2).ValuesAsNumpy()
-
-            daily_data = {"date": pd.date_range(
-            start = pd.to_datetime(daily.Time(), unit = "s", utc = True),
-            end = pd.to_datetime(daily.TimeEnd(), unit = "s", utc = True),
-            freq = pd.Timedelta(seconds = daily.Interval()),
-            inclusive = "left"
-            )}
-
-            daily_data["temperature_2m_mean"] = daily_temperature_2m_mean
-            daily_data["wind_speed_10m_mean"] = daily_wind_speed_10m_mean
-            daily_data["pressure_msl_mean"] = daily_pressure_msl_mean
-
-            daily_dataframe = pd.DataFrame(data = daily_data)
-            return daily_dataframe
+            return self._fetch_weather(params_eolienne, "daily")
 
 
         elif self.energy_type == "hydro":
-            all_data = []
-            code_entite = "Y321002101"
             grandeurs = ["QmnJ", "HIXnJ"]
-
-            for grandeur in grandeurs:
+            stations = {site["code_entite"]: site["site"] for site in self.sites}
+            start = self.hydro_reference_start()
+            # Plusieurs stations par requête tant que la page Hub'eau peut tout contenir
+            days = (pd.Timestamp(end) - pd.Timestamp(start)).days + 1
+            per_request = max(1, HUBEAU_MAX_ROWS // days)
+
+            def fetch(job: tuple) -> pd.DataFrame:
+                codes, grandeur = job
                 params = {
-                            "code_entite": code_entite, 
+                            "code_entite": ",".join(codes),
                             "grandeur_hydro_elab": grandeur, 
-                            "date_debut_obs" : "2022-09-01",
-                            "date_fin_obs": "2025-09-29",
-                            "size": 1500,}
+                            "date_debut_obs" : start,
+                            "date_fin_obs": end,
+                            "size": HUBEAU_MAX_ROWS,}
                 response = requests.get(self.api_url, params=params)
                 response.raise_for_status()
                 df = pd.DataFrame(response.json().get("data", []))
                 if not df.empty:
                     df["grandeur_hydro_elab"] = grandeur
-                    all_data.append(df)
+                return df
+
+            jobs = [(codes, grandeur) for codes in chunks(list(stations), per_request) for grandeur in grandeurs]
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                all_data = [df for df in executor.map(fetch, jobs) if not df.empty]
             if all_data:
-                return pd.concat(all_data, ignore_index=True)
-            return df
+                df = pd.concat(all_data, ignore_index=True)
+                df["site"] = df["code_station"].map(stations)
+                return df
+            return pd.DataFrame()
 
     def clean(self, df: pd.DataFrame) -> pd.DataFrame:
-        if self.energy_type == "solaire":
-          if "date" in df.columns:
-            df = df.reset_index(drop=True)
-          else:
-            df = df.reset_index().rename(columns={"index": "date"})
-
-          df["date"] = pd.to_datetime(df["date"], utc=True, errors="coerce")
-          df = df.sort_values("date").drop_duplicates("date", keep="first")
-          df = df.dropna(subset=["date"]).reset_index(drop=True)
-          df["date"] = df["date"].dt.strftime("%Y-%m-%dT%H:%M:%SZ")
-          return df
-        
-        elif self.energy_type == "eolienne":
+        if self.energy_type in ("solaire", "eolienne"):
           if "date" in df.columns:
             df = df.reset_index(drop=True)
           else:
             df = df.reset_index().rename(columns={"index": "date"})
+          if "site" not in df.columns:
+            df["site"] = self.default_site()
 
           df["date"] = pd.to_datetime(df["date"], utc=True, errors="coerce")
-          df = df.sort_values("date").drop_duplicates("date", keep="first")
-          df = df.dropna(subset=["date"]).reset_index(drop=True)
+          df = df.sort_values(["site", "date"]).drop_duplicates(["site", "date"], keep="first")
+          # Les derniers jours ne sont pas encore publiés dans l'archive Open-Meteo (valeurs vides)
+          variables = [col for col in df.columns if col not in ("site", "date")]
+          df = df.dropna(subset=["date"]).dropna(subset=variables, how="all").reset_index(drop=True)
           df["date"] = df["date"].dt.strftime("%Y-%m-%dT%H:%M:%SZ")
           return df
         
         if self.energy_type == "hydro":
-          start="2022-09-01"
-          end="2025-09-29"
+          start, end = self.window()
+          reference_start = self.hydro_reference_start()
           expected_cols=("QmnJ", "HIXnJ")
+          sites = [site["site"] for site in self.sites]
+          full_idx = pd.MultiIndex.from_product([sites, pd.date_range(reference_start, end, freq="D")], names=["site", "date"])
 
           if df.empty:
               print("Aucune donnée API")
-              end = end or date.today().isoformat()
-              idx = pd.date_range(start, end, freq="D")
-              out = pd.DataFrame(index=idx).reset_index().rename(columns={"index": "date"})
+              out = pd.DataFrame(index=full_idx).reset_index()
               out.insert(0, "id", range(1, len(out) + 1))
               return out
           
           df = df.copy()
+          if "site" not in df.columns:
+              df["site"] = self.default_site()
           df["date"] = pd.to_datetime(df["date_obs_elab"]).dt.normalize()
-          df = df[["date", "grandeur_hydro_elab", "resultat_obs_elab"]]
+          df = df[["site", "date", "grandeur_hydro_elab", "resultat_obs_elab"]]
 
           df_pivot = (
               df.pivot_table(
-                  index="date",
+                  index=["site", "date"],
                   columns="grandeur_hydro_elab",
                   values="resultat_obs_elab",
                   aggfunc="mean"
@@ -236,13 +300,11 @@ class APIDataHandler(DataHandler):
               .sort_index()
           )
 
-          end = end or date.today().isoformat()
-          full_idx = pd.date_range(start, end, freq="D")
           df_pivot = df_pivot.reindex(full_idx)
 
           present_cols = [c for c in expected_cols if c in df_pivot.columns]
           if not present_cols:
-              out = df_pivot.reset_index().rename(columns={"index": "date"})
+              out = df_pivot.reset_index()
               out.insert(0, "id", range(1, len(out) + 1))
               return out
 
@@ -259,19 +321,20 @@ class APIDataHandler(DataHandler):
               if col in bounds_max:
                   df_pivot[col] = df_pivot[col].where(df_pivot[col] < bounds_max[col])
 
+          # Filtre IQR calculé station par station
           for col in df_pivot.columns:
-              series = df_pivot[col].dropna()
-              if series.empty:
-                  continue
-              Q1 = series.quantile(0.25)
-              Q3 = series.quantile(0.75)
+              by_site = df_pivot.groupby(level="site")[col]
+              Q1 = by_site.transform("quantile", 0.25)
+              Q3 = by_site.transform("quantile", 0.75)
               IQR = Q3 - Q1
               low = Q1 - 1.5 * IQR
               high = Q3 + 1.5 * IQR
               df_pivot[col] = df_pivot[col].where((df_pivot[col] >= low) & (df_pivot[col] <= high))
 
-          out = df_pivot.reset_index().rename(columns={"index": "date"})
+          # Bornes calculées sur tout l'historique chargé, seule la période demandée est retournée
+          out = df_pivot.reset_index()
+          out = out[out["date"] >= pd.Timestamp(start)]
           out["date"] = out["date"].dt.strftime("%Y-%m-%dT%H:%M:%SZ")
-          out = out[["date","QmnJ", "HIXnJ"]].dropna()
+          out = out[["site", "date", "QmnJ", "HIXnJ"]].dropna()
 
-          return out
\ No newline at end of file
+          return out
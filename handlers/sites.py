@@ -0,0 +1,10 @@
+# Sites par défaut (parc historique), partagés par les handlers et la base : sans dépendance
+
+# Coordonnées Open-Meteo ou station Hub'eau
+DEFAULT_SITES = {
+    "solaire": [{"site": "montpellier", "latitude": 43.6109, "longitude": 3.8763}],
+    "eolienne": [{"site": "montpellier", "latitude": 43.6109, "longitude": 3.8763}],
+    "hydro": [{"site": "Y321002101", "code_entite": "Y321002101"}],
+}
+# Nom du site par défaut : site des lignes existantes avant le passage multi-sites
+DEFAULT_SITE = {energy_type: sites[0]["site"] for energy_type, sites in DEFAULT_SITES.items()}